@@ -1,18 +1,70 @@
 from flask import Flask
 from flask_cors import CORS
+import importlib
+import os
 
-# Import route blueprints
+# Import route blueprints (lightweight: each route loads the services it uses on first request)
 from app.routes.report import report_bp
-from app.routes.search import search_bp
+from app.routes.forecast import forecast_bp
+from app.routes.jobs import jobs_bp
+from app.routes.market import market_bp
+from app.routes.search import search_bp, init_symbols
+from app.routes.metrics import metrics_bp
+from app.utils.metrics import instrument_app
 
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-def create_app():
+# Modules each subsystem imports on first use; warm_up() loads them ahead of time
+PRELOAD_MODULES = {
+    "report": (
+        "app.services.yfinance_client",
+        "app.services.serper_client",
+        "app.services.openai_client",
+        "openai",
+        "ml.predict",
+        "ml.price_store",
+        "xgboost",
+        "app.utils.charts",
+        "app.utils.pdf",
+    ),
+    "forecast": ("ml.predict", "ml.price_store", "xgboost"),
+    "market": ("app.services.yfinance_client",),
+    "search": (),
+}
+
+# Subsystems to load when the app is created: "all" or a comma-separated list
+# of PRELOAD_MODULES keys. Empty (the default) loads everything lazily.
+APP_PRELOAD = os.getenv("APP_PRELOAD", "")
+
+
+def warm_up(subsystems=None):
+    """
+    Loads subsystems before the first request instead of on it. Run it in a
+    pre-fork server's master (e.g. gunicorn --preload with APP_PRELOAD=all) so
+    workers start warm and share the imported code copy-on-write.
+
+    Parameters:
+        subsystems (list): PRELOAD_MODULES keys; defaults to all of them.
+    """
+    for name in subsystems or PRELOAD_MODULES:
+        for module in PRELOAD_MODULES[name]:
+            importlib.import_module(module)
+
+        # Build the search index from the local snapshot; the Finnhub refresher
+        # still starts in each worker on its first search request
+        if name == "search":
+            init_symbols(refresh=False)
+
+
+def create_app(preload=None):
     """
     Factory function to create and configure the Flask application.
+
+    Parameters:
+        preload (str): Subsystems to warm up, as in APP_PRELOAD (defaults to it).
     """
     app = Flask(__name__)
 
@@ -21,7 +73,18 @@ def create_app():
 
     # Register modular route blueprints
     app.register_blueprint(report_bp)
+    app.register_blueprint(forecast_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(market_bp)
     app.register_blueprint(search_bp)
+    app.register_blueprint(metrics_bp)
+
+    # Time every request for /metrics (and the optional Server-Timing header)
+    instrument_app(app)
+
+    preload = APP_PRELOAD if preload is None else preload
+    if preload:
+        warm_up(None if preload == "all" else [name.strip() for name in preload.split(",")])
 
     return app
 
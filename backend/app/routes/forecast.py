@@ -0,0 +1,71 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
+import os
+
+# Define a Flask Blueprint for standalone forecast endpoints
+forecast_bp = Blueprint("forecast", __name__, url_prefix="/api/forecast")
+
+# Upper bounds for a single batch request
+MAX_BATCH_TICKERS = int(os.getenv("MAX_BATCH_TICKERS", "500"))
+MAX_HORIZON = 365
+
+
+@forecast_bp.route("/batch", methods=["POST", "OPTIONS"])
+def forecast_batch():
+    """
+    Forecasts a list of tickers and streams one NDJSON line per ticker as it finishes.
+
+    Request body:
+        {"tickers": ["AAPL", "MSFT", ...], "horizon": 30}
+
+    Each streamed line is either
+        {"ticker": ..., "forecast": [{"date": ..., "predicted_price": ...}, ...]}
+    or
+        {"ticker": ..., "error": "..."}
+    """
+    # Handle preflight CORS requests
+    if request.method == "OPTIONS":
+        return '', 204
+
+    data = request.get_json(silent=True) or {}
+    tickers = data.get("tickers")
+    horizon = data.get("horizon", 30)
+
+    # Validate input
+    if not isinstance(tickers, list) or not tickers or not all(isinstance(t, str) and t for t in tickers):
+        return jsonify({"error": "Missing or invalid tickers list"}), 400
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return jsonify({"error": f"At most {MAX_BATCH_TICKERS} tickers per batch"}), 400
+    if not isinstance(horizon, int) or not 1 <= horizon <= MAX_HORIZON:
+        return jsonify({"error": f"Horizon must be an integer between 1 and {MAX_HORIZON}"}), 400
+
+    tickers = [t.strip().upper() for t in tickers]
+
+    # The forecasting stack (pandas, XGBoost) loads on the first forecast request
+    from ml.predict import forecast_many
+
+    def generate():
+        for ticker, result, error in forecast_many(tickers, horizon):
+            if error is not None:
+                line = {"ticker": ticker, "error": error}
+            else:
+                forecast_df, _ = result
+                line = {
+                    "ticker": ticker,
+                    "forecast": [
+                        {"date": row["date"].isoformat(), "predicted_price": row["predicted_price"]}
+                        for row in forecast_df.to_dict(orient="records")
+                    ],
+                }
+            yield json.dumps(line) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@forecast_bp.route("/cache", methods=["GET"])
+def forecast_cache():
+    """
+    Returns hit/miss statistics for the forecast cache.
+    """
+    from ml.predict import forecast_cache_stats
+    return jsonify(forecast_cache_stats())
@@ -0,0 +1,39 @@
+from flask import Blueprint, request, jsonify
+from ml.jobs import submit_training, get_job
+from ml.registry import FORECASTERS
+
+# Define a Flask Blueprint for background model training jobs
+jobs_bp = Blueprint("jobs", __name__, url_prefix="/api/jobs")
+
+
+@jobs_bp.route("", methods=["POST", "OPTIONS"])
+def create_training_job():
+    """
+    Queues model training for a ticker. Requests for a ticker that is already
+    being trained return the existing job instead of starting another one.
+    """
+    # Handle preflight CORS requests
+    if request.method == "OPTIONS":
+        return '', 204
+
+    data = request.get_json(silent=True) or {}
+    ticker = data.get("ticker")
+    forecaster = data.get("forecaster")
+    if not ticker:
+        return jsonify({"error": "Missing ticker"}), 400
+    if forecaster is not None and forecaster not in FORECASTERS:
+        return jsonify({"error": f"Forecaster must be one of: {', '.join(FORECASTERS)}"}), 400
+
+    job = submit_training(ticker.strip().upper(), forecaster)
+    return jsonify(job.to_dict()), 202
+
+
+@jobs_bp.route("/<ticker>", methods=["GET"])
+def training_job_status(ticker):
+    """
+    Returns the status of the most recent training job for a ticker.
+    """
+    job = get_job(ticker.strip().upper())
+    if job is None:
+        return jsonify({"error": f"No training job for ticker: {ticker}"}), 404
+    return jsonify(job.to_dict())
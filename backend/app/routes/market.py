@@ -0,0 +1,34 @@
+from flask import Blueprint, request, jsonify
+import os
+
+# Define a Flask Blueprint for market data endpoints
+market_bp = Blueprint("market", __name__, url_prefix="/api/market")
+
+# Upper bound for a single bulk quote request
+MAX_QUOTE_TICKERS = int(os.getenv("MAX_QUOTE_TICKERS", "200"))
+
+
+@market_bp.route("/quotes", methods=["GET"])
+def market_quotes():
+    """
+    Returns market data for several tickers, fetching their quotes in one bulk request.
+
+    Query parameters:
+        tickers: Comma-separated ticker symbols, e.g. ?tickers=AAPL,MSFT
+    """
+    tickers = [t.strip().upper() for t in request.args.get("tickers", "").split(",") if t.strip()]
+
+    # Validate input
+    if not tickers:
+        return jsonify({"error": "Missing tickers"}), 400
+    if len(tickers) > MAX_QUOTE_TICKERS:
+        return jsonify({"error": f"At most {MAX_QUOTE_TICKERS} tickers per request"}), 400
+
+    # yfinance (and pandas) load on the first market data request
+    from app.services.yfinance_client import get_market_data_many
+
+    try:
+        return jsonify(get_market_data_many(tickers))
+    except Exception as e:
+        # Handle upstream market data errors
+        return jsonify({"error": str(e)}), 502
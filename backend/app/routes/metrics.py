@@ -0,0 +1,14 @@
+from flask import Blueprint, Response
+from app.utils.metrics import render
+
+# Define a Flask Blueprint for the Prometheus scrape endpoint
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Stage timings, cache hit/miss counters, outbound call latency and errors,
+    and request latency for this worker process, in Prometheus text format.
+    """
+    return Response(render(), mimetype="text/plain; version=0.0.4")
@@ -1,26 +1,136 @@
-from flask import Blueprint, request, jsonify, send_file
-from app.services.serper_client import fetch_news
-from app.services.openai_client import (
-    summarize_articles,
-    generate_swot_analysis,
-    generate_investment_recommendation
-)
-from ml.predict import forecast_prices
-from ml.train import train_and_save
-from app.utils.charts import plot_predictions
-from app.services.yfinance_client import get_stock_data_from_yf
-from app.utils.pdf import generate_pdf_report
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context, current_app
+from app.utils.report_store import save_report, get_report, get_report_pdf
+from app.utils.metrics import timed_stage, carry_timings, stage_timeouts
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import io
+import os
+import queue
+import tempfile
+import time
 
 # Define a Flask Blueprint for report generation endpoints
 report_bp = Blueprint("report", __name__, url_prefix="/api")
 
+# The services behind reports (yfinance, OpenAI, XGBoost, matplotlib,
+# ReportLab) are imported inside the functions that use them, so a worker
+# only loads them once it serves a report (or when preloaded, see app.main.warm_up)
+
+# Bounded pool shared by all requests for running independent report stages
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "8"))
+_stage_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report-stage")
+
+# Maximum time (seconds) each stage may take, measured from when it was submitted
+STAGE_TIMEOUTS = {
+    "market_data": float(os.getenv("STAGE_TIMEOUT_MARKET_DATA", "20")),
+    "news": float(os.getenv("STAGE_TIMEOUT_NEWS", "60")),
+    "swot": float(os.getenv("STAGE_TIMEOUT_SWOT", "60")),
+    "forecast": float(os.getenv("STAGE_TIMEOUT_FORECAST", "180")),
+    "recommendation": float(os.getenv("STAGE_TIMEOUT_RECOMMENDATION", "60")),
+}
+
+# Default time (seconds) a report waits for a missing model to finish training
+# before it is returned without a forecast
+TRAINING_WAIT_SECONDS = float(os.getenv("TRAINING_WAIT_SECONDS", "60"))
+
+
+class StageTimeout(Exception):
+    """
+    Raised when a report stage does not finish within its configured timeout.
+    """
+    def __init__(self, stage):
+        super().__init__(f"Report stage '{stage}' timed out after {STAGE_TIMEOUTS[stage]:.0f}s")
+        self.stage = stage
+
+
+def _submit_stage(stage, fn, *args):
+    """
+    Schedules a report stage on the shared pool and records its deadline.
+
+    Returns:
+        tuple: (stage name, future, monotonic deadline)
+    """
+    deadline = time.monotonic() + STAGE_TIMEOUTS[stage]
+
+    def run():
+        with timed_stage(stage):
+            return fn(*args)
+
+    return stage, _stage_executor.submit(carry_timings(run)), deadline
+
+
+def _stage_result(handle):
+    """
+    Waits for a submitted stage until its deadline and returns its result.
+    Exceptions raised inside the stage propagate to the caller.
+    """
+    stage, future, deadline = handle
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeoutError:
+        future.cancel()
+        stage_timeouts.inc(stage=stage)
+        raise StageTimeout(stage)
+
+
+def _news_with_summary(company_name, serper_key, openai_key, on_token=None):
+    """
+    Fetches news for the company and summarizes it (the two steps are sequential).
+
+    Returns:
+        tuple: (articles, news_summary)
+    """
+    from app.services.openai_client import summarize_articles
+    from app.services.serper_client import fetch_news
+
+    with timed_stage("news_search"):
+        articles = fetch_news(company_name, serper_key)
+    return articles, summarize_articles(articles, openai_key, on_token=on_token)
+
+
+def _forecast_with_chart(ticker, training_wait):
+    """
+    Forecasts prices and renders the chart. If no model exists yet, one is
+    trained in the background and the forecast waits up to `training_wait` seconds.
+
+    Returns:
+        tuple: (forecast records, training MAE or None, base64 chart or None,
+                forecast status: "ready" or "pending")
+    """
+    from app.utils.charts import plot_predictions
+    from ml.jobs import wait_for_training
+    from ml.predict import forecast_prices
+
+    try:
+        forecast_df, history_df = forecast_prices(ticker)
+        mae = None
+    except FileNotFoundError:
+        # If model not found, train a new one in the background and wait for it
+        with timed_stage("training_wait"):
+            job = wait_for_training(ticker, training_wait)
+        if job.status == "failed":
+            job.future.result()  # Re-raise the training error
+        if job.status != "done":
+            return [], None, None, "pending"
+
+        mae = job.future.result()
+        forecast_df, history_df = forecast_prices(ticker)
+
+    # Prepare data for frontend rendering
+    forecast_list = forecast_df.to_dict(orient="records")
+    chart_base64 = plot_predictions(history_df, forecast_df)
+
+    return forecast_list, mae, chart_base64, "ready"
+
+
 @report_bp.route("/report", methods=["POST", "OPTIONS"])
 def generate_full_report():
     # Handle preflight CORS requests
     if request.method == "OPTIONS":
         return '', 204
 
+    from app.services.openai_client import generate_swot_analysis, generate_investment_recommendation
+    from app.services.yfinance_client import get_stock_data_from_yf
+
     try:
         # Parse input data from request payload
         data = request.get_json()
@@ -32,34 +142,35 @@ def generate_full_report():
         if not ticker or not openai_key or not serper_key:
             return jsonify({"error": "Missing ticker, OpenAI key, or Serper key"}), 400
 
-        # Retrieve core financial data for the specified ticker
-        stock_data = get_stock_data_from_yf(ticker)
+        # Time to wait for a first-time model, bounded by the forecast stage budget
+        training_wait = min(
+            float(data.get("training_wait", TRAINING_WAIT_SECONDS)),
+            STAGE_TIMEOUTS["forecast"] - 5,
+        )
+
+        # Kick off the stages that only need the ticker
+        market_stage = _submit_stage("market_data", get_stock_data_from_yf, ticker)
+        forecast_stage = _submit_stage("forecast", _forecast_with_chart, ticker, training_wait)
+
+        # News and SWOT depend only on the company name from the market data
+        stock_data = _stage_result(market_stage)
         company_name = stock_data.get("longName", ticker)
 
-        # Retrieve and summarize news articles for the company
-        articles = fetch_news(company_name, serper_key)
-        news_summary = summarize_articles(articles, openai_key)
+        news_stage = _submit_stage("news", _news_with_summary, company_name, serper_key, openai_key)
+        swot_stage = _submit_stage("swot", generate_swot_analysis, company_name, openai_key)
 
-        # Generate SWOT analysis using OpenAI
-        swot_markdown = generate_swot_analysis(company_name, openai_key).get("markdown", "")
+        # The recommendation is the only stage that joins forecast and news
+        forecast_list, mae, chart_base64, forecast_status = _stage_result(forecast_stage)
+        articles, news_summary = _stage_result(news_stage)
 
-        # Attempt to forecast future stock prices
-        try:
-            forecast_df, history_df = forecast_prices(ticker)
-            mae = None
-        except FileNotFoundError:
-            # If model not found, train a new one and forecast again
-            mae = train_and_save(ticker)
-            forecast_df, history_df = forecast_prices(ticker)
-
-        # Prepare data for frontend rendering
-        forecast_list = forecast_df.to_dict(orient="records")
-        chart_base64 = plot_predictions(history_df, forecast_df)
-
-        # Generate investment recommendation based on forecast and news
-        recommendation_data = generate_investment_recommendation(
+        recommendation_stage = _submit_stage(
+            "recommendation",
+            generate_investment_recommendation,
             forecast_list, news_summary, company_name, openai_key
         )
+
+        swot_markdown = _stage_result(swot_stage).get("markdown", "")
+        recommendation_data = _stage_result(recommendation_stage)
         recommendation = recommendation_data.get("recommendation", "No recommendation.")
 
         # Assemble full report response
@@ -73,36 +184,257 @@ def generate_full_report():
             },
             "swot": swot_markdown,
             "forecast": forecast_list,
+            "forecastStatus": forecast_status,
             "mae": round(mae, 2) if mae is not None else None,
             "priceChart": chart_base64,
             "recommendation": recommendation
         }
 
+        # Keep the report server-side so the PDF download only needs its ID
+        report["reportId"] = save_report(report)
+
         return jsonify(report)
 
+    except StageTimeout as e:
+        # A stage did not finish within its time budget
+        return jsonify({"error": str(e)}), 504
+
     except Exception as e:
         # Handle unexpected application errors
         return jsonify({"error": str(e)}), 500
 
+def _ndjson(event):
+    # Flask's encoder, so dates serialize exactly as they do in jsonify responses
+    return current_app.json.dumps(event) + "\n"
+
+@report_bp.route("/report/stream", methods=["POST", "OPTIONS"])
+def stream_full_report():
+    """
+    Builds the same report as /api/report but streams it as NDJSON, one event
+    per line, as soon as each part is ready:
+
+        {"type": "section", "section": "marketData", "data": {...}}
+        {"type": "token", "section": "swot", "text": "..."}
+        {"type": "done", "reportId": "..."}
+        {"type": "error", "error": "...", "stage": "..."}
+
+    A section's `data` holds report fields to merge into the report built so
+    far. Text sections (news, swot, recommendation) stream their tokens before
+    the section event that carries the full text.
+    """
+    # Handle preflight CORS requests
+    if request.method == "OPTIONS":
+        return '', 204
+
+    # Parse and validate input before the stream starts
+    data = request.get_json(silent=True) or {}
+    ticker = data.get("ticker")
+    openai_key = data.get("openai_key")
+    serper_key = data.get("serper_key")
+
+    if not ticker or not openai_key or not serper_key:
+        return jsonify({"error": "Missing ticker, OpenAI key, or Serper key"}), 400
+
+    # Time to wait for a first-time model, bounded by the forecast stage budget
+    training_wait = min(
+        float(data.get("training_wait", TRAINING_WAIT_SECONDS)),
+        STAGE_TIMEOUTS["forecast"] - 5,
+    )
+
+    from app.services.openai_client import generate_swot_analysis, generate_investment_recommendation
+    from app.services.yfinance_client import get_stock_data_from_yf
+
+    # Stage threads push tokens and completion notices here; the response drains it
+    events = queue.Queue()
+
+    def token_sink(section):
+        return lambda text: events.put({"type": "token", "section": section, "text": text})
+
+    def generate():
+        report = {"ticker": ticker}
+        pending = {}
+
+        def start(stage, fn, *args, **kwargs):
+            handle = _submit_stage(stage, lambda: fn(*args, **kwargs))
+            pending[stage] = handle
+            handle[1].add_done_callback(lambda _: events.put({"type": "stage_done", "stage": stage}))
+
+        def section(name, **fields):
+            report.update(fields)
+            return _ndjson({"type": "section", "section": name, "data": fields})
+
+        # Stages that only need the ticker start right away
+        start("market_data", get_stock_data_from_yf, ticker)
+        start("forecast", _forecast_with_chart, ticker, training_wait)
+
+        try:
+            while pending:
+                # Wake up no later than the earliest stage deadline
+                next_deadline = min(deadline for _, _, deadline in pending.values())
+                try:
+                    event = events.get(timeout=max(next_deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    stage = min(pending, key=lambda name: pending[name][2])
+                    if not pending[stage][1].done():
+                        _stage_result(pending[stage])  # Raises StageTimeout
+                    continue
+
+                if event["type"] == "token":
+                    yield _ndjson(event)
+                    continue
+
+                stage = event["stage"]
+                result = _stage_result(pending.pop(stage))
+
+                if stage == "market_data":
+                    company_name = result.get("longName", ticker)
+                    yield section("marketData", ticker=ticker, company=company_name, marketData=result)
+
+                    # News and SWOT depend only on the company name
+                    start("news", _news_with_summary, company_name, serper_key, openai_key,
+                          on_token=token_sink("news"))
+                    start("swot", generate_swot_analysis, company_name, openai_key,
+                          on_token=token_sink("swot"))
+
+                elif stage == "forecast":
+                    forecast_list, mae, chart_base64, forecast_status = result
+                    yield section(
+                        "forecast",
+                        forecast=forecast_list,
+                        forecastStatus=forecast_status,
+                        mae=round(mae, 2) if mae is not None else None,
+                        priceChart=chart_base64,
+                    )
+
+                elif stage == "news":
+                    articles, news_summary = result
+                    yield section("news", news={"summary": news_summary, "articles": articles})
+
+                elif stage == "swot":
+                    yield section("swot", swot=result.get("markdown", ""))
+
+                elif stage == "recommendation":
+                    yield section("recommendation", recommendation=result.get("recommendation", "No recommendation."))
+
+                # The recommendation is the only stage that joins forecast and news
+                if "forecast" in report and "news" in report and "recommendation" not in pending \
+                        and "recommendation" not in report:
+                    start(
+                        "recommendation",
+                        generate_investment_recommendation,
+                        report["forecast"], report["news"]["summary"], report["company"], openai_key,
+                        on_token=token_sink("recommendation"),
+                    )
+
+            # Keep the report server-side so the PDF download only needs its ID
+            yield _ndjson({"type": "done", "reportId": save_report(report)})
+
+        except StageTimeout as e:
+            # A stage did not finish within its time budget
+            yield _ndjson({"type": "error", "error": str(e), "stage": e.stage})
+
+        except Exception as e:
+            # Handle unexpected application errors
+            yield _ndjson({"type": "error", "error": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        # Ask proxies not to buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _generate_pdf(report_data):
+    # ReportLab loads on the first PDF download
+    from app.utils.pdf import generate_pdf_report
+    return generate_pdf_report(report_data)
+
+def _pdf_response(pdf_bytes):
+    # Return PDF as downloadable file
+    return send_file(
+        io.BytesIO(pdf_bytes),
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name="genvest_report.pdf"
+    )
+
 @report_bp.route("/download", methods=["POST"])
 def download_pdf_report():
     try:
-        # Parse report content from the request
-        report_data = request.get_json().get("report")
+        data = request.get_json() or {}
+
+        # Preferred: the ID of a report generated by /api/report
+        report_id = data.get("report_id")
+        if report_id:
+            pdf_bytes = get_report_pdf(report_id, _generate_pdf)
+            if pdf_bytes is None:
+                return jsonify({"error": "Report not found or expired"}), 404
+            return _pdf_response(pdf_bytes)
+
+        # Fallback: the full report content posted back by the client
+        report_data = data.get("report")
         if not report_data:
             return jsonify({"error": "No report data provided"}), 400
 
         # Generate PDF file bytes from report content
-        pdf_bytes = generate_pdf_report(report_data)
+        pdf_bytes = _generate_pdf(report_data)
+        return _pdf_response(pdf_bytes)
+
+    except Exception as e:
+        # Handle PDF generation or transmission errors
+        return jsonify({"error": str(e)}), 500
+
+@report_bp.route("/download/<report_id>", methods=["GET"])
+def download_stored_pdf_report(report_id):
+    try:
+        pdf_bytes = get_report_pdf(report_id, _generate_pdf)
+        if pdf_bytes is None:
+            return jsonify({"error": "Report not found or expired"}), 404
+        return _pdf_response(pdf_bytes)
+
+    except Exception as e:
+        # Handle PDF generation or transmission errors
+        return jsonify({"error": str(e)}), 500
+
+# Largest number of stored reports a single portfolio PDF may cover
+MAX_PORTFOLIO_REPORTS = int(os.getenv("MAX_PORTFOLIO_REPORTS", "100"))
+
+@report_bp.route("/portfolio/download", methods=["POST"])
+def download_portfolio_pdf():
+    try:
+        data = request.get_json() or {}
+        report_ids = data.get("report_ids") or []
+
+        if not isinstance(report_ids, list) or not report_ids:
+            return jsonify({"error": "No report IDs provided"}), 400
+        if len(report_ids) > MAX_PORTFOLIO_REPORTS:
+            return jsonify({"error": f"At most {MAX_PORTFOLIO_REPORTS} reports per portfolio"}), 400
+
+        # Every report must still be stored; list the ones that are not
+        reports = [get_report(report_id) for report_id in report_ids]
+        missing = [report_id for report_id, report in zip(report_ids, reports) if report is None]
+        if missing:
+            return jsonify({"error": "Reports not found or expired", "missing": missing}), 404
+
+        from app.utils.pdf import write_portfolio_pdf
+
+        # Render to a temp file on disk and stream it back in chunks; the file
+        # is removed when the response closes it
+        output = tempfile.TemporaryFile()
+        try:
+            write_portfolio_pdf(reports, output, title=data.get("title") or "Portfolio Report")
+            output.seek(0)
+        except Exception:
+            output.close()
+            raise
 
-        # Return PDF as downloadable file
         return send_file(
-            io.BytesIO(pdf_bytes),
+            output,
             mimetype="application/pdf",
             as_attachment=True,
-            download_name="genvest_report.pdf"
+            download_name="genvest_portfolio.pdf"
         )
 
     except Exception as e:
         # Handle PDF generation or transmission errors
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
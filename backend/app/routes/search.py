@@ -1,7 +1,18 @@
 from flask import Blueprint, request, jsonify
-import requests
+import json
 import os
+import tempfile
+import threading
+import time
 from dotenv import load_dotenv
+from app.utils.search_index import SymbolIndex
+from app.services.http import get_session
+from app.utils.metrics import external_call
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked refreshes
+    fcntl = None
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,23 +23,123 @@ search_bp = Blueprint("search", __name__)
 # Retrieve Finnhub API key from environment
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 
-# In-memory cache for storing stock symbols
+# Local snapshot of the symbol universe shared by all worker processes
+SYMBOLS_SNAPSHOT = os.getenv("SYMBOLS_SNAPSHOT", os.path.join("data", "symbols.json"))
+
+# How often (seconds) the snapshot is refreshed from Finnhub, and the retry delay after a failure
+SYMBOLS_REFRESH_SECONDS = int(os.getenv("SYMBOLS_REFRESH_SECONDS", str(24 * 60 * 60)))
+SYMBOLS_RETRY_SECONDS = int(os.getenv("SYMBOLS_RETRY_SECONDS", "60"))
+
+# (connect, read) timeout for the Finnhub request
+FINNHUB_TIMEOUT = (5, 30)
+
+# In-memory cache for storing stock symbols and the search index built over them
 all_stocks = []
+symbol_index = SymbolIndex([])
 
-def load_symbols():
+# Set once the first symbol list (snapshot or Finnhub) has been published
+symbols_ready = threading.Event()
+
+# Modification time of the snapshot this process last published
+_published_mtime = None
+
+# PID that owns the background refresher (threads do not survive a fork)
+_refresher_pid = None
+_refresher_lock = threading.Lock()
+
+
+def _publish_symbols(stocks, snapshot_mtime):
+    """
+    Builds the search index for a symbol list and swaps it in atomically.
+    """
+    global all_stocks, symbol_index, _published_mtime
+
+    # Build the index before publishing so searches never see a partial one
+    symbol_index = SymbolIndex(stocks)
+    all_stocks = stocks
+    _published_mtime = snapshot_mtime
+    symbols_ready.set()
+
+
+def _snapshot_mtime():
+    """
+    Returns the modification time of the snapshot file, or None if it does not exist.
+    """
+    try:
+        return os.path.getmtime(SYMBOLS_SNAPSHOT)
+    except OSError:
+        return None
+
+
+def _publish_snapshot():
+    """
+    Publishes the snapshot file if it is newer than what this process serves.
+
+    Returns:
+        bool: True if the served list now matches the snapshot.
     """
-    Load and cache a list of US common stock symbols from Finnhub API.
-    This function runs once at startup.
+    mtime = _snapshot_mtime()
+    if mtime is None:
+        return False
+    if mtime == _published_mtime:
+        return True
+
+    stocks = load_snapshot()
+    if stocks is None:
+        return False
+
+    _publish_symbols(stocks, mtime)
+    print(f"Loaded {len(stocks)} tickers from snapshot")
+    return True
+
+
+def load_snapshot():
+    """
+    Loads the symbol list from the local snapshot file.
+
+    Returns:
+        list or None: The stored stock dicts, or None if there is no usable snapshot.
+    """
+    try:
+        with open(SYMBOLS_SNAPSHOT, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        if os.path.exists(SYMBOLS_SNAPSHOT):
+            print(f"⚠️ Ignoring unreadable symbols snapshot: {e}")
+        return None
+
+
+def save_snapshot(stocks):
+    """
+    Writes the symbol list to the snapshot file atomically (temp file + rename).
+    """
+    directory = os.path.dirname(SYMBOLS_SNAPSHOT) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".symbols-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(stocks, f)
+        os.replace(tmp_path, SYMBOLS_SNAPSHOT)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def fetch_symbols():
     """
-    global all_stocks
-    print("Loading symbols list from Finnhub...")
+    Downloads the list of US common stock symbols from the Finnhub API.
 
+    Returns:
+        list: Stock dicts with "symbol" and "name" keys.
+    """
     url = f"https://finnhub.io/api/v1/stock/symbol?exchange=US&token={FINNHUB_API_KEY}"
-    res = requests.get(url)
-    res.raise_for_status()
+    with external_call("finnhub"):
+        res = get_session().get(url, timeout=FINNHUB_TIMEOUT)
+        res.raise_for_status()
     data = res.json()
 
-    all_stocks = [
+    return [
         {
             "symbol": item["symbol"],
             "name": item.get("description", "") or item.get("displaySymbol", ""),
@@ -36,41 +147,118 @@ def load_symbols():
         for item in data if item["type"] == "Common Stock"
     ]
 
+
+def load_symbols():
+    """
+    Refreshes the symbol list from Finnhub, stores it in the snapshot and publishes it.
+
+    Workers coordinate through a lock file: whoever gets the lock first downloads,
+    and the others pick up the fresh snapshot instead of downloading it again.
+    """
+    os.makedirs(os.path.dirname(SYMBOLS_SNAPSHOT) or ".", exist_ok=True)
+
+    with open(SYMBOLS_SNAPSHOT + ".lock", "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        # Another worker may have refreshed the snapshot while we waited
+        mtime = _snapshot_mtime()
+        if mtime is not None and time.time() - mtime < SYMBOLS_REFRESH_SECONDS:
+            if _publish_snapshot():
+                return
+
+        print("Loading symbols list from Finnhub...")
+        stocks = fetch_symbols()
+        save_snapshot(stocks)
+
+    _publish_symbols(stocks, _snapshot_mtime())
     print(f"Loaded {len(all_stocks)} tickers from Finnhub")
 
-# Initial symbol loading at application startup
-load_symbols()
+
+def _refresh_symbols_forever():
+    """
+    Background loop that keeps the symbol list fresh without blocking requests.
+    """
+    while True:
+        mtime = _snapshot_mtime()
+        if mtime is not None and time.time() - mtime < SYMBOLS_REFRESH_SECONDS:
+            # Snapshot is fresh: serve it (another worker may have refreshed it)
+            # and check back when it is due or in case a newer one appears
+            if _publish_snapshot():
+                time.sleep(min(SYMBOLS_REFRESH_SECONDS - (time.time() - mtime), SYMBOLS_RETRY_SECONDS))
+                continue
+
+        try:
+            load_symbols()
+        except Exception as e:
+            print(f"⚠️ Symbol refresh failed, retrying in {SYMBOLS_RETRY_SECONDS}s: {e}")
+            time.sleep(SYMBOLS_RETRY_SECONDS)
+
+
+def init_symbols(refresh=True):
+    """
+    Publishes the local snapshot immediately (if any) and, with `refresh`,
+    starts the background refresher for the current process. Safe to call
+    more than once.
+    """
+    global _refresher_pid
+
+    # Already refreshing in this process (the common case, checked on every search request)
+    if _refresher_pid == os.getpid():
+        return
+
+    with _refresher_lock:
+        if _refresher_pid == os.getpid():
+            return
+
+        # Serve whatever snapshot exists right away, even if it is stale
+        if not symbols_ready.is_set():
+            _publish_snapshot()
+
+        if not refresh:
+            return
+        _refresher_pid = os.getpid()
+
+        threading.Thread(
+            target=_refresh_symbols_forever, name="symbols-refresh", daemon=True
+        ).start()
+
+
+@search_bp.before_request
+def ensure_symbols():
+    """
+    Loads the symbols on the first search request of each process, so workers
+    that never serve search never download them (and refreshers start after a fork).
+    """
+    init_symbols()
+
+
+@search_bp.route("/api/ready", methods=["GET"])
+def readiness():
+    """
+    Readiness probe: succeeds once the symbol list has been loaded.
+    """
+    if not symbols_ready.is_set():
+        return jsonify({"ready": False}), 503
+    return jsonify({"ready": True, "symbols": len(all_stocks)})
 
 @search_bp.route("/api/search", methods=["GET"])
 def search_tickers():
     """
-    Perform a fuzzy search on cached stock symbols and return the top matches.
+    Search the indexed stock symbols and return the top matches.
     Accepts query parameter "q" representing the user's search input.
     """
     query = request.args.get("q", "").strip().lower()
     if not query:
         return jsonify([])
 
-    results = []
-
-    for stock in all_stocks:
-        symbol = stock["symbol"].lower()
-        name = stock["name"].lower()
-
-        score = 0
-        if query == symbol or query == name:
-            score = 100
-        elif symbol.startswith(query) or name.startswith(query):
-            score = 90
-        elif query in symbol or query in name:
-            score = 80
-
-        if score > 0:
-            results.append({**stock, "score": score})
+    # Symbols are still loading for the first time
+    if not symbols_ready.is_set():
+        return jsonify({"error": "Symbol list is still loading"}), 503, {"Retry-After": "5"}
 
-    # Sort matches by score (descending), then by symbol (alphabetical)
-    results = sorted(results, key=lambda x: (-x["score"], x["symbol"]))
+    # Look up the top 10 matches in the prebuilt index
+    results = symbol_index.search(query, limit=10)
 
-    # Return top 10 matches with only relevant fields
-    final = [{"symbol": r["symbol"], "name": r["name"]} for r in results[:10]]
-    return jsonify(final)
\ No newline at end of file
+    # Return matches with only relevant fields
+    final = [{"symbol": r["symbol"], "name": r["name"]} for r in results]
+    return jsonify(final)
@@ -0,0 +1,107 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.utils.cache import LRUCache, MISSING
+
+# (connect, read) timeouts in seconds applied to every outbound HTTP call
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+# Retries on connection errors (and 429/5xx for GET/HEAD), with exponential backoff plus random jitter
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Keep-alive connections kept open per host
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+# OpenAI request timeout (seconds) and retry count; the SDK backs off with jitter itself
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# Shared requests session, created on first use
+_session = None
+_session_lock = threading.Lock()
+
+# One OpenAI client (and connection pool) per API key
+_openai_clients = LRUCache(max_entries=int(os.getenv("OPENAI_CLIENT_CACHE_SIZE", "64")))
+_openai_lock = threading.Lock()
+
+
+class _TimeoutSession(requests.Session):
+    """
+    Session that applies DEFAULT_TIMEOUT to requests made without an explicit timeout.
+    """
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def _build_session():
+    retry = Retry(
+        total=HTTP_RETRIES,
+        status_forcelist=RETRY_STATUSES,
+        # POSTs (news search) are billed once the server accepts them, so they are only
+        # retried when the connection could not be made and nothing was sent
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        backoff_factor=HTTP_BACKOFF,
+        backoff_jitter=HTTP_BACKOFF,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+
+    session = _TimeoutSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """
+    Returns the process-wide requests session: keep-alive connection pools,
+    default connect/read timeouts, retries on failed connections and, for
+    GET/HEAD only, on read errors and 429/5xx responses.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_openai_client(api_key):
+    """
+    Returns a cached OpenAI client for an API key so its connections are reused
+    across calls, with a request timeout and bounded retries.
+
+    Parameters:
+        api_key (str): The user's OpenAI API key.
+
+    Returns:
+        OpenAI: Client bound to the key.
+    """
+    client = _openai_clients.get(api_key)
+    if client is not MISSING:
+        return client
+
+    with _openai_lock:
+        client = _openai_clients.get(api_key)
+        if client is MISSING:
+            # The SDK is large; only processes that call OpenAI load it
+            from openai import OpenAI, Timeout
+
+            client = OpenAI(
+                api_key=api_key,
+                timeout=Timeout(OPENAI_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+                max_retries=OPENAI_MAX_RETRIES,
+            )
+            _openai_clients.set(api_key, client)
+    return client
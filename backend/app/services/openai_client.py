@@ -1,13 +1,141 @@
-from openai import OpenAI
+from app.services.http import get_openai_client
+from app.utils.cache import LRUCache, SQLiteCache, TieredCache, CacheStats, MISSING
+from app.utils.singleflight import SingleFlight
+from app.utils.metrics import timed_stage, external_call, register_cache
+import hashlib
+import json
+import os
+
+# How long (seconds) each kind of completion is reused; 0 disables caching for that kind
+COMPLETION_TTLS = {
+    "news_summary": int(os.getenv("COMPLETION_TTL_NEWS_SUMMARY", str(6 * 60 * 60))),
+    "swot": int(os.getenv("COMPLETION_TTL_SWOT", str(24 * 60 * 60))),
+    "recommendation": int(os.getenv("COMPLETION_TTL_RECOMMENDATION", str(6 * 60 * 60))),
+}
+
+# Completions kept in memory, backed by an on-disk store that survives restarts
+# and is shared by every worker (set COMPLETION_CACHE_DB="" to keep them in memory only)
+COMPLETION_CACHE_DB = os.getenv("COMPLETION_CACHE_DB", os.path.join("data", "completions.sqlite"))
+_completion_cache = TieredCache(
+    LRUCache(max_entries=int(os.getenv("COMPLETION_CACHE_SIZE", "1024"))),
+    SQLiteCache(COMPLETION_CACHE_DB) if COMPLETION_CACHE_DB else None,
+)
+
+# Hit/miss counters per kind of completion
+_completion_stats = {kind: CacheStats() for kind in COMPLETION_TTLS}
+
+# Identical requests made at the same time share one API call
+_completion_flights = SingleFlight()
+
+# Export hit/miss counters at /metrics
+register_cache("completion", _completion_cache)
+for _kind, _stats in _completion_stats.items():
+    register_cache(f"completion_{_kind}", _stats)
+register_cache("completion_singleflight", _completion_flights)
+
+
+def _completion_key(kind, model, messages, params):
+    """
+    Hashes everything that determines a completion's output. The API key is
+    left out on purpose: the same prompt is answered the same way for every user.
+    """
+    payload = json.dumps(
+        {"kind": kind, "model": model, "messages": messages, "params": params},
+        sort_keys=True, separators=(",", ":"),
+    )
+    return f"{kind}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def _chat_completion(kind, api_key, messages, model="gpt-3.5-turbo", on_token=None, **params):
+    """
+    Returns the text of a chat completion, reusing a cached one for an
+    identical request made within the kind's TTL.
+
+    Parameters:
+        kind (str): A key of COMPLETION_TTLS; selects the TTL and the stats bucket.
+        api_key (str): OpenAI API key used on a cache miss.
+        messages (list): Chat messages.
+        model (str): Model name.
+        on_token (callable): Optional; receives the text as it is generated
+            (a cached completion arrives as a single chunk).
+        **params: Completion parameters (temperature, max_tokens, ...).
+
+    Returns:
+        str: The completion text.
+    """
+    # Time the whole call (cache hits included) as one stage per kind
+    with timed_stage(f"llm_{kind}"):
+        ttl = COMPLETION_TTLS[kind]
+        key = _completion_key(kind, model, messages, params)
+
+        if ttl > 0:
+            cached = _completion_cache.get(key)
+            _completion_stats[kind].record(cached is not MISSING)
+            if cached is not MISSING:
+                if on_token:
+                    on_token(cached)
+                return cached
+
+        # Only the caller that runs the request sees its tokens as they arrive;
+        # callers that joined it receive the finished text in one chunk
+        ran_request = []
+
+        def request_completion():
+            ran_request.append(True)
+            content = _request_completion(api_key, model, messages, on_token, params)
+            if ttl > 0 and content:
+                _completion_cache.set(key, content, ttl=ttl)
+            return content
+
+        content = _completion_flights.do(key, request_completion)
+        if on_token and not ran_request:
+            on_token(content)
+
+        return content
+
+
+def _request_completion(api_key, model, messages, on_token, params):
+    """
+    Calls the API, streaming the response when `on_token` is given.
 
-def summarize_articles(articles, api_key):
+    Returns:
+        str: The completion text.
+    """
+    # Reuse the pooled OpenAI client for the user's API key
+    client = get_openai_client(api_key)
+
+    with external_call("openai"):
+        if on_token:
+            # Stream the completion, passing each token on as it arrives
+            parts = []
+            for chunk in client.chat.completions.create(model=model, messages=messages, stream=True, **params):
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_token(delta)
+            content = "".join(parts)
+        else:
+            response = client.chat.completions.create(model=model, messages=messages, **params)
+            content = response.choices[0].message.content
+
+    return content
+
+
+def completion_cache_stats():
+    """
+    Returns hit/miss counters for the completion cache, overall and per kind.
+    """
+    stats = _completion_cache.stats_dict()
+    stats["kinds"] = {kind: counter.as_dict() for kind, counter in _completion_stats.items()}
+    return stats
+
+
+def summarize_articles(articles, api_key, on_token=None):
     """
     Summarizes a list of news articles using OpenAI's GPT model.
     Each article should include a 'title' and a 'snippet'.
+    Pass `on_token` to receive the summary text as it is generated.
     """
-    # Initialize the OpenAI client with the user's API key
-    client = OpenAI(api_key=api_key)
-
     # Build a structured prompt using the titles and snippets of each article
     article_texts = [f"- {a['title']}: {a.get('snippet', '')}" for a in articles]
     prompt = (
@@ -16,26 +144,26 @@ def summarize_articles(articles, api_key):
         + "\n".join(article_texts)
     )
 
-    # Request a summary from the OpenAI Chat Completion API
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
+    # Request a summary from the OpenAI Chat Completion API (or the cache)
+    summary = _chat_completion(
+        "news_summary",
+        api_key,
+        on_token=on_token,
         messages=[{ "role": "user", "content": prompt }],
         temperature=0.5,
         max_tokens=300
     )
 
     # Return the generated summary text
-    return response.choices[0].message.content
+    return summary
 
 
-def generate_swot_analysis(company_name, api_key):
+def generate_swot_analysis(company_name, api_key, on_token=None):
     """
     Generates a SWOT analysis and investment summary for a given company.
     The response includes a company description, SWOT details, and outlook.
+    Pass `on_token` to receive the markdown as it is generated.
     """
-    # Initialize the OpenAI client with the user's API key
-    client = OpenAI(api_key=api_key)
-
     # Prompt describing the structure and content expected in the response
     prompt = (
         f"Provide a professional investment summary for {company_name}. Include:\n"
@@ -45,9 +173,11 @@ def generate_swot_analysis(company_name, api_key):
         "Respond in clear markdown format with bold headers for each section."
     )
 
-    # Request the SWOT analysis from the GPT model
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
+    # Request the SWOT analysis from the GPT model (or the cache)
+    markdown = _chat_completion(
+        "swot",
+        api_key,
+        on_token=on_token,
         messages=[{ "role": "user", "content": prompt }],
         temperature=0.5,
         max_tokens=500
@@ -55,18 +185,16 @@ def generate_swot_analysis(company_name, api_key):
 
     # Return the formatted markdown content
     return {
-        "markdown": response.choices[0].message.content
+        "markdown": markdown
     }
 
 
-def generate_investment_recommendation(forecast_prices, news_summary, company_name, api_key):
+def generate_investment_recommendation(forecast_prices, news_summary, company_name, api_key, on_token=None):
     """
     Uses OpenAI to analyze forecasted prices and news sentiment, then provides
     an investment recommendation (Buy, Hold, or Sell) with reasoning.
+    Pass `on_token` to receive the recommendation text as it is generated.
     """
-    # Initialize the OpenAI client with the user's API key
-    client = OpenAI(api_key=api_key)
-
     # Attempt to determine price trend direction
     try:
         prices = [p["predicted_price"] for p in forecast_prices]
@@ -86,9 +214,11 @@ def generate_investment_recommendation(forecast_prices, news_summary, company_na
         "Explain your reasoning in a short paragraph for an investor audience."
     )
 
-    # Request recommendation from the GPT model
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
+    # Request recommendation from the GPT model (or the cache)
+    recommendation = _chat_completion(
+        "recommendation",
+        api_key,
+        on_token=on_token,
         messages=[{ "role": "user", "content": prompt }],
         temperature=0.4,
         max_tokens=300
@@ -96,5 +226,5 @@ def generate_investment_recommendation(forecast_prices, news_summary, company_na
 
     # Return the recommendation message
     return {
-        "recommendation": response.choices[0].message.content
+        "recommendation": recommendation
     }
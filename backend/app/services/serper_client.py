@@ -1,15 +1,114 @@
-import requests
+from app.services.http import get_session
+from app.utils.cache import LRUCache, SQLiteCache, TieredCache, MISSING
+from app.utils.singleflight import SingleFlight
+from app.utils.metrics import external_call, register_cache
+from urllib.parse import urlsplit, urlunsplit
+import os
+import re
+import threading
+
+# How long (seconds) search results for a query are reused
+NEWS_TTL = int(os.getenv("NEWS_TTL_SECONDS", "600"))
+
+# Maximum Serper requests in flight at once across the whole process
+NEWS_MAX_IN_FLIGHT = int(os.getenv("NEWS_MAX_IN_FLIGHT", "4"))
+
+# Normalized articles per normalized query, optionally shared by every worker on disk
+_news_cache = TieredCache(
+    LRUCache(max_entries=int(os.getenv("NEWS_CACHE_SIZE", "1024")), ttl=NEWS_TTL),
+    SQLiteCache(os.getenv("NEWS_CACHE_DB"), ttl=NEWS_TTL)
+    if os.getenv("NEWS_CACHE_DB") else None,
+)
+
+# Articles by canonical URL, so a story returned for several queries is stored once
+_articles_by_url = LRUCache(max_entries=int(os.getenv("NEWS_ARTICLE_CACHE_SIZE", "4096")), ttl=NEWS_TTL)
+
+# Concurrent searches for the same query share one Serper request
+_flights = SingleFlight()
+_in_flight = threading.BoundedSemaphore(NEWS_MAX_IN_FLIGHT)
+
+# Export hit/miss counters at /metrics
+register_cache("news", _news_cache)
+register_cache("news_articles", _articles_by_url)
+register_cache("news_singleflight", _flights)
+
+# Words that distinguish share classes or legal forms but not the company
+_NAME_NOISE = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited",
+    "plc", "llc", "lp", "sa", "nv", "ag", "se", "the", "class", "common", "stock",
+    "shares", "ordinary", "adr", "ads", "a", "b", "c",
+}
+
+# Article fields kept from Serper's response
+_ARTICLE_FIELDS = ("title", "link", "snippet", "date", "source", "imageUrl")
+
+
+def normalize_query(query):
+    """
+    Reduces a company name to the words that identify it, so names that
+    differ only in punctuation, case, legal form or share class
+    ("Alphabet Inc. Class A", "Alphabet Inc") share one cache entry.
+    Serper itself is sent the name as given, which searches better.
+    """
+    words = re.findall(r"[a-z0-9&]+", query.lower())
+    kept = [w for w in words if w not in _NAME_NOISE]
+    return " ".join(kept or words)
+
+
+def _canonical_url(url):
+    """
+    Lowercases the host and drops query string, fragment and trailing slash.
+    """
+    parts = urlsplit(url or "")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def _normalize_articles(items):
+    """
+    Keeps the fields we use, drops duplicate URLs and reuses the stored copy
+    of articles already seen for another query.
+    """
+    articles = []
+    seen = set()
+    for item in items:
+        url = _canonical_url(item.get("link"))
+        if not url or url in seen:
+            continue
+        seen.add(url)
+
+        article = _articles_by_url.get(url)
+        if article is MISSING:
+            article = {field: item.get(field) for field in _ARTICLE_FIELDS if item.get(field) is not None}
+            _articles_by_url.set(url, article)
+        articles.append(article)
+    return articles
+
 
 def fetch_news(query, api_key):
     """
     Fetches the latest news articles related to a given query using the Serper API.
+    Results are cached per normalized query for NEWS_TTL seconds, and
+    concurrent searches across the process share NEWS_MAX_IN_FLIGHT requests.
 
     Parameters:
         query (str): The search term (e.g., company name or stock symbol).
         api_key (str): The Serper API key for authorization.
 
     Returns:
-        list: A list of news article dictionaries returned by the API.
+        list: News article dicts (title, link, snippet, date, source, imageUrl).
+    """
+    key = normalize_query(query)
+
+    articles = _news_cache.get(key)
+    if articles is MISSING:
+        articles = _flights.do(("news", key), _search_news, query.strip(), key, api_key)
+    return articles
+
+
+def _search_news(query, key, api_key):
+    """
+    Calls Serper for a query and caches the normalized articles under its
+    normalized form `key`.
     """
     # Set request headers including API key and content type
     headers = {
@@ -25,15 +124,19 @@ def fetch_news(query, api_key):
         "num": 5           # Number of results to return
     }
 
-    # Make POST request to Serper's news search endpoint
-    response = requests.post(
-        "https://google.serper.dev/news",
-        headers=headers,
-        json=payload
-    )
-    
-    # Raise an exception for any non-successful response
-    response.raise_for_status()
-
-    # Return the list of news items (empty list if not found)
-    return response.json().get("news", [])
+    # Make POST request to Serper's news search endpoint over the shared,
+    # retrying session (default connect/read timeouts apply)
+    with _in_flight, external_call("serper"):
+        response = get_session().post(
+            "https://google.serper.dev/news",
+            headers=headers,
+            json=payload
+        )
+
+        # Raise an exception for any non-successful response
+        response.raise_for_status()
+
+    # Normalize the news items (empty list if not found) and keep them for later reports
+    articles = _normalize_articles(response.json().get("news", []))
+    _news_cache.set(key, articles)
+    return articles
@@ -1,4 +1,174 @@
 import yfinance as yf
+from app.utils.cache import LRUCache, SQLiteCache, TieredCache, MISSING
+from app.utils.singleflight import SingleFlight
+from app.utils.metrics import external_call, register_cache
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
+
+# Quote fields (price, volume, 52-week range) change constantly; keep them briefly
+QUOTE_TTL = int(os.getenv("QUOTE_TTL_SECONDS", "60"))
+
+# Company fields (name, sector, exchange, market cap, P/E) barely change; keep them for a day
+STATIC_TTL = int(os.getenv("STATIC_INFO_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Company field lookups run at once for a batch of uncached tickers
+STATIC_INFO_MAX_WORKERS = int(os.getenv("STATIC_INFO_MAX_WORKERS", "8"))
+
+_quotes = LRUCache(max_entries=int(os.getenv("QUOTE_CACHE_SIZE", "2048")), ttl=QUOTE_TTL)
+
+# Optional on-disk tier so every worker shares (and survives restarts with) the static fields
+_static_info = TieredCache(
+    LRUCache(max_entries=int(os.getenv("STATIC_INFO_CACHE_SIZE", "4096")), ttl=STATIC_TTL),
+    SQLiteCache(os.getenv("MARKET_DATA_CACHE_DB"), ttl=STATIC_TTL)
+    if os.getenv("MARKET_DATA_CACHE_DB") else None,
+)
+
+# Concurrent lookups of the same ticker share one Yahoo request
+_flights = SingleFlight()
+
+# Export hit/miss counters at /metrics
+register_cache("quotes", _quotes)
+register_cache("static_info", _static_info)
+register_cache("market_data_singleflight", _flights)
+
+
+def _number(value):
+    """
+    Converts a pandas/numpy scalar to a plain float, or None if it is missing.
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _fetch_static_info(ticker):
+    """
+    Reads the slowly changing company fields from Yahoo's quote summary.
+    Market cap and trailing P/E are kept as Yahoo reports them (market cap
+    covers every share class), along with the price they were quoted at.
+    """
+    with external_call("yahoo"):
+        info = yf.Ticker(ticker).info
+    return {
+        "longName": info.get("longName"),
+        "sector": info.get("sector"),
+        "exchange": info.get("exchange"),
+        "marketCap": info.get("marketCap"),
+        "trailingPE": info.get("trailingPE"),
+        "quotedPrice": info.get("currentPrice") or info.get("regularMarketPrice"),
+    }
+
+
+def get_static_info(ticker):
+    """
+    Returns the cached company fields for a ticker, fetching them at most once per STATIC_TTL.
+    """
+    static = _static_info.get(ticker)
+    if static is MISSING:
+        static = _flights.do(("static", ticker), _fetch_static_info, ticker)
+        _static_info.set(ticker, static)
+    return static
+
+
+def _fetch_quotes(tickers):
+    """
+    Downloads one year of daily bars for all tickers in a single request and
+    derives the quote fields from them.
+
+    Returns:
+        dict: { ticker: {currentPrice, volume, fiftyTwoWeekHigh, fiftyTwoWeekLow} }
+              for every ticker Yahoo returned data for.
+    """
+    with external_call("yahoo"):
+        raw = yf.download(
+            tickers,
+            period="1y",
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            threads=True,
+            progress=False,
+        )
+
+    quotes = {}
+    for ticker in tickers:
+        try:
+            bars = raw[ticker].dropna(subset=["Close"])
+        except KeyError:
+            continue
+        if bars.empty:
+            continue
+
+        # The latest bar is today's session while the market is open
+        quotes[ticker] = {
+            "currentPrice": _number(bars["Close"].iloc[-1]),
+            "volume": int(bars["Volume"].iloc[-1]) if _number(bars["Volume"].iloc[-1]) is not None else None,
+            "fiftyTwoWeekHigh": _number(bars["High"].max()),
+            "fiftyTwoWeekLow": _number(bars["Low"].min()),
+        }
+    return quotes
+
+
+def get_quotes(tickers):
+    """
+    Returns quote fields for many tickers, downloading only the ones not
+    cached within QUOTE_TTL, all in one bulk request.
+
+    Parameters:
+        tickers (list): Ticker symbols.
+
+    Returns:
+        dict: { ticker: quote dict } (tickers without data are omitted).
+    """
+    quotes = {}
+    missing = []
+    for ticker in dict.fromkeys(tickers):
+        quote = _quotes.get(ticker)
+        if quote is MISSING:
+            missing.append(ticker)
+        else:
+            quotes[ticker] = quote
+
+    if missing:
+        fetched = _flights.do(("quotes", tuple(missing)), _fetch_quotes, missing)
+        for ticker, quote in fetched.items():
+            _quotes.set(ticker, quote)
+        quotes.update(fetched)
+
+    return quotes
+
+
+def _market_data(ticker, quote, static):
+    """
+    Combines quote and company fields into the market data returned to clients.
+    Yahoo's market cap and P/E move with the price, so they are scaled from the
+    price they were quoted at to the current one.
+    """
+    price = quote.get("currentPrice")
+    quoted = static.get("quotedPrice")
+    market_cap = static.get("marketCap")
+    pe = static.get("trailingPE")
+
+    if price and quoted:
+        market_cap = round(market_cap * price / quoted) if market_cap else market_cap
+        pe = round(pe * price / quoted, 2) if pe else pe
+
+    return {
+        "ticker": ticker,
+        "longName": static.get("longName"),
+        "currentPrice": price,
+        "marketCap": market_cap,
+        "trailingPE": pe,
+        "volume": quote.get("volume"),
+        "fiftyTwoWeekHigh": quote.get("fiftyTwoWeekHigh"),
+        "fiftyTwoWeekLow": quote.get("fiftyTwoWeekLow"),
+        "sector": static.get("sector"),
+        "exchange": static.get("exchange"),
+    }
+
 
 def get_stock_data_from_yf(ticker):
     """
@@ -10,22 +180,27 @@ def get_stock_data_from_yf(ticker):
     Returns:
         dict: A dictionary containing key market data for the specified stock.
     """
-    # Create a yfinance Ticker object for the given symbol
-    stock = yf.Ticker(ticker)
+    quote = get_quotes([ticker]).get(ticker, {})
+    return _market_data(ticker, quote, get_static_info(ticker))
 
-    # Retrieve the stock's information dictionary
-    info = stock.info
 
-    # Return selected fields in a structured dictionary
+def get_market_data_many(tickers):
+    """
+    Market data for many tickers: one bulk request for the quotes, plus the
+    (usually cached) company fields of each ticker. Uncached company fields
+    are fetched concurrently, alongside the quotes.
+
+    Returns:
+        dict: { ticker: market data dict } in the order given.
+    """
+    tickers = list(dict.fromkeys(tickers))
+
+    with ThreadPoolExecutor(max_workers=min(len(tickers), STATIC_INFO_MAX_WORKERS) + 1) as executor:
+        quotes = executor.submit(get_quotes, tickers)
+        statics = list(executor.map(get_static_info, tickers))
+        quotes = quotes.result()
+
     return {
-        "ticker": ticker,
-        "longName": info.get("longName"),                      
-        "currentPrice": info.get("currentPrice"),              
-        "marketCap": info.get("marketCap"),                    
-        "trailingPE": info.get("trailingPE"),                  
-        "volume": info.get("volume"),                          
-        "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh"),      
-        "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow"),        
-        "sector": info.get("sector"),                         
-        "exchange": info.get("exchange"),                      
+        ticker: _market_data(ticker, quotes.get(ticker, {}), static)
+        for ticker, static in zip(tickers, statics)
     }
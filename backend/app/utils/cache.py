@@ -0,0 +1,251 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Sentinel returned by cache lookups when a key is absent or expired
+MISSING = object()
+
+
+class CacheStats:
+    """
+    Thread-safe hit/miss counters shared by the cache implementations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class LRUCache:
+    """
+    In-process LRU cache with optional per-entry TTL and memory budget.
+
+    Parameters:
+        max_entries (int): Maximum number of entries kept.
+        ttl (float): Default time-to-live in seconds (None = never expires).
+        max_bytes (int): Optional memory budget; requires `sizeof`.
+        sizeof (callable): Returns the approximate size in bytes of a value.
+    """
+
+    def __init__(self, max_entries=256, ttl=None, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes if sizeof else None
+        self.sizeof = sizeof
+        self.stats = CacheStats()
+        self._data = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        self.stats.record(entry is not None)
+        return entry[0] if entry is not None else default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self.sizeof(value) if self.max_bytes else 0
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+
+            # Evict least recently used entries until within both limits
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes and len(self._data) > 1)
+            ):
+                self._remove(next(iter(self._data)))
+
+    def delete_prefix(self, prefix):
+        """
+        Removes every entry whose (string) key starts with prefix.
+        """
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+
+class SQLiteCache:
+    """
+    On-disk cache shared by every process on the host, backed by SQLite.
+    Values are pickled, so only trusted, application-produced data belongs here.
+
+    Parameters:
+        path (str): Database file path (created if missing).
+        ttl (float): Default time-to-live in seconds (None = never expires).
+        max_entries (int): Rows kept after periodic pruning.
+    """
+
+    # Prune expired/overflow rows once every this many writes
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, ttl=None, max_entries=10_000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL, updated_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps the cache safe across threads
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key, default=MISSING):
+        return self.get_entry(key, default)[0]
+
+    def get_entry(self, key, default=MISSING):
+        """
+        Looks up a key along with the time it has left to live.
+
+        Returns:
+            tuple: (value, remaining TTL in seconds or None if it never expires),
+                   or (default, None) if the key is absent or expired.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+        now = time.time()
+        hit = row is not None and (row[1] is None or row[1] > now)
+        self.stats.record(hit)
+        if not hit:
+            return default, None
+        return pickle.loads(row[0]), None if row[1] is None else row[1] - now
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, updated_at) VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at, now),
+            )
+
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(conn, now)
+
+    def delete_prefix(self, prefix):
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def _prune(self, conn, now):
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM cache WHERE key NOT IN "
+            "(SELECT key FROM cache ORDER BY updated_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+
+class TieredCache:
+    """
+    Local LRU in front of an optional shared cache. Shared hits are promoted
+    into the local tier, with the time they have left in the shared tier, so
+    repeated lookups stay in-process and still expire on schedule.
+    """
+
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self.stats = CacheStats()
+
+    def get(self, key, default=MISSING):
+        value = self.local.get(key)
+        if value is MISSING and self.shared is not None:
+            value, ttl = self.shared.get_entry(key)
+            if value is not MISSING:
+                self.local.set(key, value, ttl)
+
+        self.stats.record(value is not MISSING)
+        return default if value is MISSING else value
+
+    def set(self, key, value, ttl=None):
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl)
+
+    def delete_prefix(self, prefix):
+        self.local.delete_prefix(prefix)
+        if self.shared is not None:
+            self.shared.delete_prefix(prefix)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats_dict(self):
+        """
+        Returns overall hit/miss counts plus the per-tier breakdown.
+        """
+        stats = self.stats.as_dict()
+        stats["local"] = self.local.stats.as_dict()
+        stats["entries"] = len(self.local)
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats.as_dict()
+        return stats
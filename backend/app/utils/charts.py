@@ -1,46 +1,134 @@
-import matplotlib
-import matplotlib.pyplot as plt
-matplotlib.use('Agg')  # Use a non-interactive backend suitable for servers
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # Non-interactive backend suitable for servers
+from matplotlib.dates import AutoDateLocator, AutoDateFormatter, date2num
+from app.utils.cache import LRUCache, MISSING
+from app.utils.metrics import timed_stage, register_cache
 
 import io
 import base64
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
 
-def plot_predictions(historical_df, forecast_df):
+# Rendered charts keyed by a hash of the plotted data and output options
+_chart_cache = LRUCache(max_entries=128)
+register_cache("chart", _chart_cache)
+
+# Each thread reuses its own prepared figure; figures are never shared across threads
+_local = threading.local()
+
+
+def _build_template():
+    """
+    Creates a figure with the axes, styling and (empty) lines used by every chart.
+    Rendering a chart only swaps in the data.
+
+    Returns:
+        tuple: (figure, axes, historical line, forecast line)
     """
-    Generates a matplotlib line plot comparing historical and forecasted stock prices.
+    # Initialize plot with fixed dimensions
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    # Historical prices and forecasted prices (dashed)
+    historical_line, = ax.plot([], [], label='Historical')
+    forecast_line, = ax.plot([], [], label='Forecast', linestyle='--')
+
+    # Dates are plotted as matplotlib date numbers with the default date ticks
+    locator = AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(AutoDateFormatter(locator))
+
+    # Configure chart labels and legend
+    ax.set_title("Stock Price Prediction")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Price")
+    ax.legend()
+
+    return fig, ax, historical_line, forecast_line
+
+
+def _template():
+    if not hasattr(_local, "template"):
+        _local.template = _build_template()
+    return _local.template
+
+
+def _date_numbers(values):
+    """
+    Converts dates (possibly tz-aware) to matplotlib date numbers on their local wall clock.
+    """
+    index = pd.DatetimeIndex(values)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return date2num(index.to_pydatetime())
+
+
+def _downsample(x, y, max_points):
+    """
+    Keeps at most `max_points` evenly spaced points, always including the last one.
+    """
+    if not max_points or len(x) <= max_points:
+        return x, y
+    idx = np.unique(np.linspace(0, len(x) - 1, max_points).round().astype(int))
+    return x[idx], y[idx]
+
+
+def _cache_key(hist_x, hist_y, fc_x, fc_y, fmt, dpi, max_points):
+    digest = hashlib.sha256()
+    for array in (hist_x, hist_y, fc_x, fc_y):
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        digest.update(b"|")
+    digest.update(f"{fmt}:{dpi}:{max_points}".encode())
+    return digest.hexdigest()
+
+
+@timed_stage("chart")
+def plot_predictions(historical_df, forecast_df, fmt="png", dpi=100, max_points=None):
+    """
+    Generates a line plot comparing historical and forecasted stock prices.
 
     Parameters:
         historical_df (pd.DataFrame): DataFrame containing past prices with datetime index and 'price' column.
         forecast_df (pd.DataFrame): DataFrame containing forecasted prices with 'date' and 'predicted_price' columns.
+        fmt (str): "png" or "svg".
+        dpi (int): PNG resolution; lower values give smaller images.
+        max_points (int): Optional cap on plotted historical points (evenly downsampled).
 
     Returns:
-        str: Base64-encoded PNG image of the plot for embedding in HTML or PDF.
+        str: Base64-encoded image of the plot for embedding in HTML or PDF.
     """
-    # Initialize plot with fixed dimensions
-    plt.figure(figsize=(10, 5))
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Unsupported chart format: {fmt}")
 
-    # Plot historical prices
-    plt.plot(historical_df.index, historical_df['price'], label='Historical')
+    hist_x = _date_numbers(historical_df.index)
+    hist_y = historical_df['price'].to_numpy(dtype=np.float64)
+    hist_x, hist_y = _downsample(hist_x, hist_y, max_points)
 
-    # Plot forecasted prices with a dashed line
-    plt.plot(forecast_df['date'], forecast_df['predicted_price'], label='Forecast', linestyle='--')
+    fc_x = _date_numbers(forecast_df['date'])
+    fc_y = forecast_df['predicted_price'].to_numpy(dtype=np.float64)
 
-    # Configure chart labels and legend
-    plt.title("Stock Price Prediction")
-    plt.xlabel("Date")
-    plt.ylabel("Price")
-    plt.legend()
-    plt.tight_layout()
+    # Identical data and options render to identical bytes, so reuse them
+    key = _cache_key(hist_x, hist_y, fc_x, fc_y, fmt, dpi, max_points)
+    cached = _chart_cache.get(key)
+    if cached is not MISSING:
+        return cached
 
-    # Save figure to a buffer in PNG format
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format="png")
-    buffer.seek(0)
+    fig, ax, historical_line, forecast_line = _template()
 
-    # Encode the image buffer to base64 string
-    image_base64 = base64.b64encode(buffer.read()).decode()
+    # Swap the new data into the prepared lines and rescale the axes
+    historical_line.set_data(hist_x, hist_y)
+    forecast_line.set_data(fc_x, fc_y)
+    ax.relim()
+    ax.autoscale_view()
+    fig.tight_layout()
 
-    # Release memory associated with the figure
-    plt.close()
+    # Save figure to a buffer and encode it as base64
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi)
+    image_base64 = base64.b64encode(buffer.getvalue()).decode()
 
+    _chart_cache.set(key, image_base64)
     return image_base64
@@ -0,0 +1,225 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+
+# Latency buckets (seconds) shared by every histogram: sub-millisecond cache
+# hits up to multi-minute model training
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Add a Server-Timing header to every response (clients can also ask per
+# request with an "X-Server-Timing: 1" header)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter with labels.
+    """
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with labels, rendered in Prometheus text format.
+    """
+
+    def __init__(self, name, help_text, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+# Work done for reports: stages, LLM calls, forecasting, training, charts, PDFs
+stage_duration = Histogram("genvest_stage_duration_seconds", "Duration of report and ML stages.")
+stage_errors = Counter("genvest_stage_errors_total", "Stages that raised an exception.")
+stage_timeouts = Counter("genvest_stage_timeouts_total", "Report stages abandoned at their deadline.")
+
+# Calls to Yahoo Finance, Serper, OpenAI and Finnhub
+external_duration = Histogram("genvest_external_request_duration_seconds", "Latency of outbound calls per service.")
+external_requests = Counter("genvest_external_requests_total", "Outbound calls per service and outcome.")
+
+# Incoming HTTP requests
+http_duration = Histogram("genvest_http_request_duration_seconds", "Latency of API requests per endpoint.")
+
+_METRICS = (stage_duration, stage_errors, stage_timeouts, external_duration, external_requests, http_duration)
+
+# Hit/miss counters exported per cache: name -> CacheStats
+_caches = {}
+
+# Server-Timing entries of the request being handled; work submitted to a
+# pool with `carry_timings` reports into the same list
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def register_cache(name, cache):
+    """
+    Exports a cache's hit/miss counters.
+
+    Parameters:
+        name (str): Value of the `cache` label.
+        cache: A CacheStats, or anything exposing one as `stats` (caches, SingleFlight).
+    """
+    _caches[name] = getattr(cache, "stats", cache)
+
+
+def carry_timings(fn):
+    """
+    Wraps `fn` to run in a copy of the caller's context, so stages timed on a
+    worker thread still show up in the request's Server-Timing header.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+@contextmanager
+def timed_stage(stage):
+    """
+    Times a unit of work, records it in the stage histogram (and its errors),
+    and adds it to the current request's Server-Timing entries.
+
+    Parameters:
+        stage (str): Stage name, e.g. "market_data" or "llm_swot".
+    """
+    timings = _request_timings.get()
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration.observe(elapsed, stage=stage)
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+@contextmanager
+def external_call(service):
+    """
+    Times an outbound call and counts it as ok or error for the service.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        external_requests.inc(service=service, outcome="error")
+        raise
+    else:
+        external_requests.inc(service=service, outcome="ok")
+    finally:
+        external_duration.observe(time.perf_counter() - start, service=service)
+
+
+def _render_caches():
+    lines = [
+        "# HELP genvest_cache_hits_total Cache lookups that found an entry.",
+        "# TYPE genvest_cache_hits_total counter",
+    ]
+    misses = [
+        "# HELP genvest_cache_misses_total Cache lookups that found nothing.",
+        "# TYPE genvest_cache_misses_total counter",
+    ]
+    for name, stats in sorted(_caches.items()):
+        label = _format_labels(_label_key({"cache": name}))
+        lines.append(f"genvest_cache_hits_total{label} {stats.hits}")
+        misses.append(f"genvest_cache_misses_total{label} {stats.misses}")
+    return lines + misses
+
+
+def render():
+    """
+    Returns every metric of this process in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in _METRICS:
+        lines += metric.render()
+    lines += _render_caches()
+    return "\n".join(lines) + "\n"
+
+
+def instrument_app(app):
+    """
+    Times every request and adds the Server-Timing header when enabled.
+    """
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        _request_timings.set([])
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        timings = _request_timings.get() or []
+        # Streamed bodies keep running after this point; stop collecting for them
+        _request_timings.set(None)
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        http_duration.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+
+        if SERVER_TIMING or request.headers.get("X-Server-Timing") == "1":
+            # Streamed responses only include the stages finished before the first byte
+            entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings]
+            entries.append(f"total;dur={elapsed * 1000:.1f}")
+            response.headers["Server-Timing"] = ", ".join(entries)
+        return response
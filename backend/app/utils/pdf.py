@@ -1,163 +1,261 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
+from reportlab.lib.utils import ImageReader, simpleSplit
 from reportlab.lib.units import inch
+from app.utils.metrics import timed_stage
+from datetime import date
 import base64
 import io
-from textwrap import wrap
 
-def generate_pdf_report(report_data):
-    # Create an in-memory PDF buffer
-    buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    y = height - 50  # Initial top margin
+# Page geometry shared by single reports and portfolio packs
+PAGE_WIDTH, PAGE_HEIGHT = letter
+LEFT_MARGIN = 40
+TEXT_WIDTH = PAGE_WIDTH - 2 * LEFT_MARGIN
+TOP = PAGE_HEIGHT - 50
+
+
+class _ReportWriter:
+    """
+    Draws report sections onto a canvas, tracking the vertical position and
+    starting new pages as needed. One writer can lay out many reports into the
+    same document.
+    """
+
+    def __init__(self, output, footer=None):
+        # Compress page content streams; large packs are mostly text
+        self.pdf = canvas.Canvas(output, pagesize=letter, pageCompression=1)
+        self.y = TOP
+        self.footer = footer
+        self.page_number = 1
+
+        # The footer is drawn once as a form and referenced from every page
+        if footer:
+            self.pdf.beginForm("footer")
+            self.pdf.setFont("Helvetica", 8)
+            self.pdf.drawString(LEFT_MARGIN, 25, footer)
+            self.pdf.endForm()
+
+    def _finish_page(self):
+        if self.footer:
+            self.pdf.doForm("footer")
+            self.pdf.setFont("Helvetica", 8)
+            self.pdf.drawRightString(PAGE_WIDTH - LEFT_MARGIN, 25, f"Page {self.page_number}")
+
+    def new_page(self):
+        self._finish_page()
+        self.pdf.showPage()
+        self.page_number += 1
+        self.y = TOP
 
     # Ensure there is enough space on the current page; otherwise, create a new one
-    def check_page_space(required_space=80):
-        nonlocal y
-        if y < required_space:
-            pdf.showPage()
-            y = height - 50
+    def check_page_space(self, required_space=80):
+        if self.y < required_space:
+            self.new_page()
 
     # Draw a large title (e.g., the company report header)
-    def draw_title(title, size=14):
-        nonlocal y
-        check_page_space(40)
-        pdf.setFont("Helvetica-Bold", size)
-        pdf.drawString(40, y, title)
-        y -= 24
+    def draw_title(self, title, size=14):
+        self.check_page_space(40)
+        self.pdf.setFont("Helvetica-Bold", size)
+        self.pdf.drawString(LEFT_MARGIN, self.y, title)
+        self.y -= 24
 
     # Draw section subtitles in bold
-    def draw_bold_subtitle(text, size=12):
-        nonlocal y
-        check_page_space(30)
-        pdf.setFont("Helvetica-Bold", size)
-        pdf.drawString(40, y, text)
-        y -= 18
+    def draw_bold_subtitle(self, text, size=12):
+        self.check_page_space(30)
+        self.pdf.setFont("Helvetica-Bold", size)
+        self.pdf.drawString(LEFT_MARGIN, self.y, text)
+        self.y -= 18
 
     # Draw wrapped text paragraphs with line breaks and padding
-    def draw_paragraph(text, font="Helvetica", size=10, leading=14, wrap_width=95):
-        nonlocal y
-        check_page_space()
-        pdf.setFont(font, size)
+    def draw_paragraph(self, text, font="Helvetica", size=10, leading=14):
+        self.check_page_space()
+        self.pdf.setFont(font, size)
         for paragraph in text.split("\n\n"):
-            lines = wrap(paragraph.strip(), width=wrap_width)
+            # Break on measured string width, once per paragraph (whitespace collapsed as before)
+            lines = simpleSplit(" ".join(paragraph.split()), font, size, TEXT_WIDTH) if paragraph.strip() else []
             for line in lines:
-                if y < 60:
-                    pdf.showPage()
-                    y = height - 50
-                    pdf.setFont(font, size)
-                pdf.drawString(40, y, line)
-                y -= leading
-            y -= 8  # Space between paragraphs
-
-    # Draw the report title with ticker
-    draw_title(f"{report_data['company']} ({report_data['ticker']}) Investment Report")
-
-    # Draw market metrics section
-    draw_bold_subtitle("Market Data")
-    market = report_data.get("marketData", {})
-    current_price = market.get("currentPrice", None)
-
-    draw_paragraph(f"""
-    Current Price: ${current_price if current_price else 'N/A'}
-    Market Cap: {market.get('marketCap', 'N/A')}
-    P/E Ratio: {market.get('trailingPE', 'N/A')}
-    52-Week High: {market.get('fiftyTwoWeekHigh', 'N/A')}
-    52-Week Low: {market.get('fiftyTwoWeekLow', 'N/A')}
-    Sector: {market.get('sector', 'N/A')}
-    """)
-
-    # Draw forecast chart image (if available)
-    chart_data = report_data.get("priceChart")
-    forecast = report_data.get("forecast", [])
-    mae = report_data.get("mae", None)
-
-    if chart_data:
+                if self.y < 60:
+                    self.new_page()
+                    self.pdf.setFont(font, size)
+                self.pdf.drawString(LEFT_MARGIN, self.y, line)
+                self.y -= leading
+            self.y -= 8  # Space between paragraphs
+
+    def draw_chart(self, chart_data):
         try:
-            draw_bold_subtitle("Price Forecast")
+            self.draw_bold_subtitle("Price Forecast")
+            # Identical images are stored once in the PDF and referenced from each use
             chart_image = ImageReader(io.BytesIO(base64.b64decode(chart_data)))
-            pdf.drawImage(chart_image, 40, y - 200, width=5.5 * inch, height=2.5 * inch, preserveAspectRatio=True)
-            y -= 220
+            self.pdf.drawImage(chart_image, LEFT_MARGIN, self.y - 200, width=5.5 * inch, height=2.5 * inch, preserveAspectRatio=True)
+            self.y -= 220
         except Exception as e:
-            draw_paragraph(f"[Chart failed to render: {e}]")
-
-    # Helper to get a predicted price for a given day index
-    def get_forecast_price(day_index):
-        try:
-            return forecast[day_index]["predicted_price"]
-        except:
-            return None
-
-    # Helper to calculate percent change from current price
-    def get_price_change(predicted):
-        if not current_price or not predicted:
-            return "N/A"
-        delta = predicted - current_price
-        pct = (delta / current_price) * 100
-        sign = "+" if pct >= 0 else ""
-        return f"{sign}{pct:.2f}%"
+            self.draw_paragraph(f"[Chart failed to render: {e}]")
 
     # Forecast summary box with 7, 14, 30-day prices and MAE
-    def draw_forecast_box():
-        nonlocal y
-        check_page_space(100)
-        pdf.setFont("Helvetica-Bold", 11)
-        pdf.drawString(40, y, "Forecast Summary (Predicted Prices & Change)")
-        y -= 18
-
-        pdf.setFont("Helvetica", 10)
+    def draw_forecast_box(self, forecast, current_price, mae):
+        self.check_page_space(100)
+        self.pdf.setFont("Helvetica-Bold", 11)
+        self.pdf.drawString(LEFT_MARGIN, self.y, "Forecast Summary (Predicted Prices & Change)")
+        self.y -= 18
+
+        self.pdf.setFont("Helvetica", 10)
         for days_ahead in [7, 14, 30]:
-            pred = get_forecast_price(days_ahead - 1)
+            pred = _forecast_price(forecast, days_ahead - 1)
             if pred:
-                change = get_price_change(pred)
+                change = _price_change(current_price, pred)
                 line = f"Next {days_ahead} Days: ${pred:.2f} ({change})"
             else:
                 line = f"Next {days_ahead} Days: N/A"
-            pdf.drawString(60, y, line)
-            y -= 14
+            self.pdf.drawString(60, self.y, line)
+            self.y -= 14
 
         if mae:
-            y -= 6
-            pdf.setFont("Helvetica-Bold", 10)
-            pdf.drawString(60, y, f"Model Validation MAE: ${mae:.2f}")
-            y -= 12
-
-        y -= 10
-
-    if forecast and current_price:
-        draw_forecast_box()
-
-    # News summary section
-    news_summary = report_data.get("news", {}).get("summary", "")
-    if news_summary:
-        draw_bold_subtitle("News Summary")
-        draw_paragraph(news_summary)
-
-    # SWOT section, parsed as markdown-style with headings
-    swot_text = report_data.get("swot", "")
-    if swot_text:
-        draw_bold_subtitle("SWOT & Investment Summary")
-        for line in swot_text.split("\n"):
-            stripped = line.strip()
-            if stripped.startswith("### "):
-                draw_bold_subtitle(stripped[4:], size=11)
-            elif stripped.startswith("## "):
-                draw_bold_subtitle(stripped[3:], size=12)
-            elif stripped.startswith("# "):
-                draw_bold_subtitle(stripped[2:], size=13)
-            else:
-                draw_paragraph(stripped)
+            self.y -= 6
+            self.pdf.setFont("Helvetica-Bold", 10)
+            self.pdf.drawString(60, self.y, f"Model Validation MAE: ${mae:.2f}")
+            self.y -= 12
+
+        self.y -= 10
+
+    def draw_report(self, report_data):
+        """
+        Lays out every section of one report, starting at the current position.
+        """
+        # Draw the report title with ticker
+        self.draw_title(f"{report_data['company']} ({report_data['ticker']}) Investment Report")
+
+        # Draw market metrics section
+        self.draw_bold_subtitle("Market Data")
+        market = report_data.get("marketData", {})
+        current_price = market.get("currentPrice", None)
+
+        self.draw_paragraph(f"""
+        Current Price: ${current_price if current_price else 'N/A'}
+        Market Cap: {market.get('marketCap', 'N/A')}
+        P/E Ratio: {market.get('trailingPE', 'N/A')}
+        52-Week High: {market.get('fiftyTwoWeekHigh', 'N/A')}
+        52-Week Low: {market.get('fiftyTwoWeekLow', 'N/A')}
+        Sector: {market.get('sector', 'N/A')}
+        """)
+
+        # Draw forecast chart image (if available)
+        chart_data = report_data.get("priceChart")
+        forecast = report_data.get("forecast", [])
+        mae = report_data.get("mae", None)
+
+        if chart_data:
+            self.draw_chart(chart_data)
+
+        if forecast and current_price:
+            self.draw_forecast_box(forecast, current_price, mae)
+
+        # News summary section
+        news_summary = report_data.get("news", {}).get("summary", "")
+        if news_summary:
+            self.draw_bold_subtitle("News Summary")
+            self.draw_paragraph(news_summary)
 
-    # AI-generated investment recommendation section
-    recommendation = report_data.get("recommendation", "")
-    if recommendation:
-        draw_bold_subtitle("AI Recommendation")
-        draw_paragraph(recommendation)
+        # SWOT section, parsed as markdown-style with headings
+        swot_text = report_data.get("swot", "")
+        if swot_text:
+            self.draw_bold_subtitle("SWOT & Investment Summary")
+            for line in swot_text.split("\n"):
+                stripped = line.strip()
+                if stripped.startswith("### "):
+                    self.draw_bold_subtitle(stripped[4:], size=11)
+                elif stripped.startswith("## "):
+                    self.draw_bold_subtitle(stripped[3:], size=12)
+                elif stripped.startswith("# "):
+                    self.draw_bold_subtitle(stripped[2:], size=13)
+                else:
+                    self.draw_paragraph(stripped)
+
+        # AI-generated investment recommendation section
+        recommendation = report_data.get("recommendation", "")
+        if recommendation:
+            self.draw_bold_subtitle("AI Recommendation")
+            self.draw_paragraph(recommendation)
+
+    def save(self):
+        self._finish_page()
+        self.pdf.showPage()
+        self.pdf.save()
+
+
+# Helper to get a predicted price for a given day index
+def _forecast_price(forecast, day_index):
+    try:
+        return forecast[day_index]["predicted_price"]
+    except (IndexError, KeyError, TypeError):
+        return None
+
+
+# Helper to calculate percent change from current price
+def _price_change(current_price, predicted):
+    if not current_price or not predicted:
+        return "N/A"
+    delta = predicted - current_price
+    pct = (delta / current_price) * 100
+    sign = "+" if pct >= 0 else ""
+    return f"{sign}{pct:.2f}%"
+
+
+@timed_stage("pdf")
+def generate_pdf_report(report_data):
+    """
+    Builds the PDF for a single report.
+
+    Returns:
+        bytes: PDF content.
+    """
+    # Create an in-memory PDF buffer
+    buffer = io.BytesIO()
+    writer = _ReportWriter(buffer)
+    writer.draw_report(report_data)
 
     # Finalize the document and return byte content
-    pdf.showPage()
-    pdf.save()
-    buffer.seek(0)
-    return buffer.read()
+    writer.save()
+    return buffer.getvalue()
+
+
+def _draw_contents_entry(writer, report_data):
+    """
+    One line of the portfolio contents page: company, current price and 30-day forecast change.
+    """
+    market = report_data.get("marketData", {})
+    price = market.get("currentPrice")
+    price_text = f"${price:.2f}" if isinstance(price, (int, float)) else "N/A"
+    change = _price_change(price, _forecast_price(report_data.get("forecast", []), 29))
+
+    writer.check_page_space(60)
+    writer.pdf.setFont("Helvetica", 10)
+    writer.pdf.drawString(LEFT_MARGIN, writer.y, f"{report_data['company']} ({report_data['ticker']})")
+    writer.pdf.drawRightString(PAGE_WIDTH - LEFT_MARGIN, writer.y, f"{price_text}   30-day: {change}")
+    writer.y -= 14
+
+
+@timed_stage("portfolio_pdf")
+def write_portfolio_pdf(reports, output, title="Portfolio Report"):
+    """
+    Writes one PDF covering many reports: a contents page, then each report
+    starting on a new page.
+
+    Parameters:
+        reports (list): Report dicts, in the order they should appear.
+        output (str or file): Path or binary file object to write the PDF to
+            (use a temp file for large packs and stream it back).
+        title (str): Heading of the contents page.
+    """
+    writer = _ReportWriter(output, footer=f"GenVest {title} - {date.today().isoformat()}")
+
+    # Contents page
+    writer.draw_title(title, size=18)
+    for report_data in reports:
+        _draw_contents_entry(writer, report_data)
+
+    # Each report starts on its own page
+    for report_data in reports:
+        writer.new_page()
+        writer.draw_report(report_data)
+
+    writer.save()
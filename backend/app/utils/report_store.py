@@ -0,0 +1,68 @@
+import os
+import uuid
+from app.utils.cache import LRUCache, SQLiteCache, TieredCache, MISSING
+from app.utils.metrics import register_cache
+
+# How long (seconds) generated reports stay downloadable
+REPORT_TTL = int(os.getenv("REPORT_TTL_SECONDS", str(60 * 60)))
+
+# Reports kept in memory per process, plus an optional on-disk store shared by
+# all workers (needed when the download may hit a different worker)
+_reports = TieredCache(
+    LRUCache(max_entries=int(os.getenv("REPORT_STORE_SIZE", "256")), ttl=REPORT_TTL),
+    SQLiteCache(os.getenv("REPORT_STORE_DB"), ttl=REPORT_TTL)
+    if os.getenv("REPORT_STORE_DB") else None,
+)
+
+# Rendered PDFs, bounded by total size since they are the largest objects
+_pdfs = LRUCache(
+    max_entries=int(os.getenv("REPORT_STORE_SIZE", "256")),
+    ttl=REPORT_TTL,
+    max_bytes=int(float(os.getenv("PDF_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    sizeof=len,
+)
+
+# Export hit/miss counters at /metrics
+register_cache("report_store", _reports)
+register_cache("report_pdf", _pdfs)
+
+
+def save_report(report):
+    """
+    Stores a generated report and returns the ID it can be retrieved by.
+    """
+    report_id = uuid.uuid4().hex
+    _reports.set(report_id, report)
+    return report_id
+
+
+def get_report(report_id):
+    """
+    Returns a stored report, or None if the ID is unknown or has expired.
+    """
+    report = _reports.get(report_id)
+    return None if report is MISSING else report
+
+
+def get_report_pdf(report_id, render):
+    """
+    Returns the PDF for a stored report, rendering it only on the first request.
+
+    Parameters:
+        report_id (str): ID returned by save_report.
+        render (callable): Builds PDF bytes from a report dict.
+
+    Returns:
+        bytes or None: PDF content, or None if the report is unknown or has expired.
+    """
+    pdf_bytes = _pdfs.get(report_id)
+    if pdf_bytes is not MISSING:
+        return pdf_bytes
+
+    report = get_report(report_id)
+    if report is None:
+        return None
+
+    pdf_bytes = render(report)
+    _pdfs.set(report_id, pdf_bytes)
+    return pdf_bytes
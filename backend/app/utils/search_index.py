@@ -0,0 +1,151 @@
+import heapq
+from bisect import bisect_left
+
+# Longest n-gram stored in the substring index; longer queries are
+# resolved through their rarest trigram and then verified
+MAX_GRAM = 3
+
+# Relevance tiers, matching the original linear-scan scoring
+EXACT_SCORE = 100
+PREFIX_SCORE = 90
+CONTAINS_SCORE = 80
+
+
+def _prefix_range(sorted_keys, prefix):
+    """
+    Returns the [start, end) slice of a sorted key list whose keys start with prefix.
+    """
+    start = bisect_left(sorted_keys, prefix)
+    end = bisect_left(sorted_keys, prefix + "\uffff", lo=start)
+    return start, end
+
+
+class SymbolIndex:
+    """
+    Read-only search index over a list of {"symbol", "name"} stock dicts.
+
+    Stocks are ranked once by symbol so that a stock's position (its "rank")
+    doubles as the tie-breaker used by the search results. All lookups return
+    ranks, which keeps top-k selection down to picking the smallest ranks.
+    """
+
+    def __init__(self, stocks):
+        # Order stocks by symbol (stable, so duplicates keep their input order)
+        self.stocks = sorted(stocks, key=lambda s: s["symbol"])
+        self._symbols = [s["symbol"].lower() for s in self.stocks]
+        self._names = [s["name"].lower() for s in self.stocks]
+
+        # Exact matches: lowercased symbol or name -> ranks
+        self._exact = {}
+        for rank, (symbol, name) in enumerate(zip(self._symbols, self._names)):
+            self._exact.setdefault(symbol, []).append(rank)
+            if name != symbol:
+                self._exact.setdefault(name, []).append(rank)
+
+        # Prefix matches: symbols are already sorted, names need their own order
+        name_order = sorted(range(len(self._names)), key=self._names.__getitem__)
+        self._sorted_names = [self._names[rank] for rank in name_order]
+        self._name_ranks = name_order
+
+        # Substring matches: every n-gram (n <= MAX_GRAM) -> ascending ranks
+        self._grams = {}
+        for rank, (symbol, name) in enumerate(zip(self._symbols, self._names)):
+            for gram in self._iter_grams(symbol) | self._iter_grams(name):
+                self._grams.setdefault(gram, []).append(rank)
+
+    def __len__(self):
+        return len(self.stocks)
+
+    @staticmethod
+    def _iter_grams(text):
+        """
+        Returns the set of distinct substrings of text with length 1..MAX_GRAM.
+        """
+        return {
+            text[i:i + n]
+            for n in range(1, MAX_GRAM + 1)
+            for i in range(len(text) - n + 1)
+        }
+
+    def _exact_ranks(self, query):
+        return sorted(set(self._exact.get(query, ())))
+
+    def _prefix_ranks(self, query, limit, exclude):
+        """
+        Returns up to `limit` smallest ranks whose symbol or name starts with query.
+        """
+        # Symbol prefixes form a contiguous run of ranks, already in order
+        start, end = _prefix_range(self._symbols, query)
+        symbol_hits = [
+            rank for rank in range(start, min(end, start + limit + len(exclude)))
+            if rank not in exclude
+        ][:limit]
+
+        # Name prefixes form a contiguous run in name order; pick the smallest ranks
+        start, end = _prefix_range(self._sorted_names, query)
+        name_hits = heapq.nsmallest(
+            limit,
+            (rank for rank in self._name_ranks[start:end] if rank not in exclude),
+        )
+
+        return heapq.nsmallest(limit, set(symbol_hits) | set(name_hits))
+
+    def _contains_ranks(self, query, limit, exclude):
+        """
+        Returns up to `limit` smallest ranks whose symbol or name contains query.
+        """
+        if len(query) <= MAX_GRAM:
+            # Short queries are themselves indexed grams: the posting list is the answer
+            candidates = self._grams.get(query, ())
+            verify = False
+        else:
+            # Scan the rarest trigram's posting list and verify the full query
+            grams = {query[i:i + MAX_GRAM] for i in range(len(query) - MAX_GRAM + 1)}
+            postings = [self._grams.get(gram, ()) for gram in grams]
+            candidates = min(postings, key=len)
+            verify = True
+
+        hits = []
+        for rank in candidates:
+            if rank in exclude:
+                continue
+            if verify and query not in self._symbols[rank] and query not in self._names[rank]:
+                continue
+            hits.append(rank)
+            if len(hits) == limit:
+                break
+        return hits
+
+    def search(self, query, limit=10):
+        """
+        Finds the best `limit` stocks for a query, ranked by match tier
+        (exact, prefix, substring) and then alphabetically by symbol.
+
+        Parameters:
+            query (str): Search text; matched case-insensitively.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: Matching stock dicts, each with an added "score" key.
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        results = []
+        seen = set()
+
+        # Fill results tier by tier, stopping as soon as `limit` is reached
+        for score, finder in (
+            (EXACT_SCORE, lambda remaining: self._exact_ranks(query)[:remaining]),
+            (PREFIX_SCORE, lambda remaining: self._prefix_ranks(query, remaining, seen)),
+            (CONTAINS_SCORE, lambda remaining: self._contains_ranks(query, remaining, seen)),
+        ):
+            remaining = limit - len(results)
+            if remaining <= 0:
+                break
+            for rank in finder(remaining):
+                seen.add(rank)
+                results.append({**self.stocks[rank], "score": score})
+
+        return results
@@ -0,0 +1,75 @@
+import threading
+
+from app.utils.cache import CacheStats
+
+
+class _Call:
+    """
+    One in-flight computation and the outcome shared with everyone waiting on it.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, callers arriving while it runs wait and receive the same result
+    (or exception). Nothing is kept once the call finishes; pair it with a
+    cache to reuse results over time.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        # A "hit" is a call that was served by another caller's computation
+        self.stats = CacheStats()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)` unless a call with the same key is already
+        running, in which case waits for it and returns its result.
+
+        Parameters:
+            key (hashable): Identifies calls that may share a result.
+            fn (callable): The computation.
+
+        Returns:
+            The result of the (possibly shared) call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        self.stats.record(not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later callers start a fresh computation
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """
+        Returns the number of computations currently running.
+        """
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,12 @@
+"""
+Offline benchmark suite for the report pipeline, forecasting, training,
+search, charts, PDFs and app cold start.
+
+External services (Yahoo Finance, Serper, OpenAI, Finnhub) are replaced by
+in-process fakes with configurable latency, and price histories come from a
+local store, so runs are repeatable without network access or API keys.
+
+    python -m bench.run                      # run everything, write bench/results/<timestamp>.json
+    python -m bench.run --only search,pdf    # a subset
+    python -m bench.run --compare bench/results/baseline.json
+"""
@@ -0,0 +1,180 @@
+"""
+Fixture-backed stand-ins for the external services, each with a configurable
+latency so benchmarks exercise the same waits a real report does.
+"""
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# Default simulated latencies in seconds
+DEFAULT_LATENCY = {
+    "yahoo": 0.05,      # one quote/history request
+    "serper": 0.15,     # one news search
+    "openai": 0.4,      # time to first token
+    "token": 0.005,     # delay between streamed tokens
+}
+
+# Words used to build fake completions
+_WORDS = (
+    "revenue growth margin outlook demand guidance competition risk cash flow "
+    "valuation earnings segment expansion pressure strong weak stable momentum"
+).split()
+
+
+class FakeYahoo:
+    """
+    Replaces the yfinance module: `download` returns OHLCV bars derived from
+    the price fixtures and `Ticker(...).info` returns static company fields.
+    """
+
+    def __init__(self, histories, latency):
+        self.histories = histories
+        self.latency = latency
+
+    def _bars(self, ticker):
+        close = self.histories[ticker]
+        return pd.DataFrame({
+            "Open": close.to_numpy(),
+            "High": close.to_numpy() * 1.01,
+            "Low": close.to_numpy() * 0.99,
+            "Close": close.to_numpy(),
+            "Adj Close": close.to_numpy(),
+            "Volume": np.full(len(close), 1_000_000),
+        }, index=close.index)
+
+    def download(self, tickers, **kwargs):
+        time.sleep(self.latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {t: self._bars(t).iloc[-252:] for t in tickers if t in self.histories}
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    def Ticker(self, ticker):
+        fake = self
+
+        class _Ticker:
+            @property
+            def info(self):
+                time.sleep(fake.latency)
+                price = float(fake.histories[ticker].iloc[-1]) if ticker in fake.histories else None
+                return {
+                    "longName": f"{ticker} Holdings",
+                    "sector": "Technology",
+                    "exchange": "NMS",
+                    "marketCap": 1_000_000_000 * price if price else None,
+                    "trailingPE": round(price / 4.2, 2) if price else None,
+                    "currentPrice": price,
+                }
+
+            def history(self, **kwargs):
+                time.sleep(fake.latency)
+                return fake._bars(ticker) if ticker in fake.histories else pd.DataFrame({"Close": []})
+
+        return _Ticker()
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class FakeHTTPSession:
+    """
+    Replaces the shared requests session: answers Serper news searches and
+    the Finnhub symbol list after a fixed delay.
+    """
+
+    def __init__(self, latency, symbols=()):
+        self.latency = latency
+        self.symbols = symbols
+
+    def post(self, url, headers=None, json=None, **kwargs):
+        time.sleep(self.latency)
+        query = (json or {}).get("q", "")
+        return _FakeResponse({"news": [
+            {
+                "title": f"{query.title()} headline {i}",
+                "link": f"https://news.example.com/{query.replace(' ', '-')}/{i}",
+                "snippet": f"Analysts discuss {query} results, outlook and guidance ({i}).",
+                "date": "1 hour ago",
+                "source": "Example News",
+            }
+            for i in range(5)
+        ]})
+
+    def get(self, url, **kwargs):
+        time.sleep(self.latency)
+        return _FakeResponse([
+            {"symbol": s["symbol"], "description": s["name"], "displaySymbol": s["symbol"], "type": "Common Stock"}
+            for s in self.symbols
+        ])
+
+
+class _Obj:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeOpenAI:
+    """
+    Replaces an OpenAI client: chat completions return deterministic text
+    after a first-token delay, streamed token by token when requested.
+    """
+
+    def __init__(self, latency, token_delay):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.chat = _Obj(completions=_Obj(create=self._create))
+
+    def _text(self, messages, max_tokens):
+        seed = sum(map(ord, json.dumps(messages))) % 997
+        return " ".join(_WORDS[(seed + i) % len(_WORDS)] for i in range(max_tokens // 2))
+
+    def _create(self, model, messages, stream=False, max_tokens=300, **params):
+        text = self._text(messages, max_tokens)
+        time.sleep(self.latency)
+
+        if not stream:
+            time.sleep(self.token_delay * len(text.split()))
+            return _Obj(choices=[_Obj(message=_Obj(content=text))])
+
+        def chunks():
+            for word in text.split(" "):
+                time.sleep(self.token_delay)
+                yield _Obj(choices=[_Obj(delta=_Obj(content=word + " "))])
+
+        return chunks()
+
+
+def install(histories, symbols, latency):
+    """
+    Points the service modules at the fakes.
+
+    Parameters:
+        histories (dict): { ticker: pd.Series of closes } served as Yahoo data.
+        symbols (list): {"symbol", "name"} dicts served as the Finnhub list.
+        latency (dict): Simulated delays (see DEFAULT_LATENCY).
+    """
+    import app.services.openai_client as openai_client
+    import app.services.serper_client as serper_client
+    import app.services.yfinance_client as yfinance_client
+    import app.routes.search as search
+    import ml.price_store as price_store
+
+    yahoo = FakeYahoo(histories, latency["yahoo"])
+    yfinance_client.yf = yahoo
+    price_store.yf = yahoo
+
+    serper_client.get_session = lambda: FakeHTTPSession(latency["serper"])
+    search.get_session = lambda: FakeHTTPSession(latency["serper"], symbols)
+
+    client = FakeOpenAI(latency["openai"], latency["token"])
+    openai_client.get_openai_client = lambda api_key: client
@@ -0,0 +1,161 @@
+"""
+Deterministic inputs for the benchmarks: price histories, a full-size symbol
+universe and a complete report.
+"""
+import glob
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+# Roughly the size of Finnhub's US common stock list
+UNIVERSE_SIZE = 28_000
+
+_NAME_WORDS = (
+    "American Global United First National Pacific Atlantic Digital Energy "
+    "Health Capital Financial Systems Technologies Resources Industries Holdings "
+    "Therapeutics Networks Materials Brands Partners Logistics Semiconductor Bancorp"
+).split()
+
+
+def synthetic_history(seed, through, sessions=1500):
+    """
+    A geometric random walk of daily closes ending at `through`.
+
+    Returns:
+        pd.Series: Closes indexed by business day.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=pd.Timestamp(through), periods=sessions)
+    returns = rng.normal(0.0004, 0.018, sessions)
+    start = 20 + (seed % 400)
+    return pd.Series(start * np.exp(np.cumsum(returns)), index=index)
+
+
+def recorded_histories(directory):
+    """
+    Loads histories recorded by the price store (one <TICKER>.npy per ticker).
+
+    Returns:
+        list: pd.Series of closes, one per file, ordered by ticker.
+    """
+    histories = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.npy"))):
+        bars = np.load(path)
+        if len(bars):
+            index = pd.DatetimeIndex(bars["date"].astype("datetime64[ns]"))
+            histories.append(pd.Series(bars["price"], index=index))
+    return histories
+
+
+def shift_to(history, through):
+    """
+    Re-dates a recorded history so its last session falls on `through`,
+    keeping the sequence of prices; the price store then treats it as current.
+    """
+    index = pd.bdate_range(end=pd.Timestamp(through), periods=len(history))
+    return pd.Series(history.to_numpy(), index=index)
+
+
+def bench_tickers(count, prefix="B"):
+    return [f"{prefix}{i:04d}" for i in range(count)]
+
+
+def histories_for(tickers, through, recorded=None):
+    """
+    Assigns a history to each ticker: recorded ones round-robin if given,
+    otherwise a seeded synthetic walk.
+
+    Returns:
+        dict: { ticker: pd.Series of closes }
+    """
+    histories = {}
+    for i, ticker in enumerate(tickers):
+        if recorded:
+            histories[ticker] = shift_to(recorded[i % len(recorded)], through)
+        else:
+            histories[ticker] = synthetic_history(i + 1, through)
+    return histories
+
+
+def write_price_store(histories, directory):
+    """
+    Writes histories in the price store's on-disk format.
+    """
+    from ml.price_store import BAR_DTYPE
+
+    os.makedirs(directory, exist_ok=True)
+    for ticker, close in histories.items():
+        bars = np.empty(len(close), dtype=BAR_DTYPE)
+        bars["date"] = close.index.to_numpy().astype("datetime64[D]")
+        bars["price"] = close.to_numpy(dtype=np.float64)
+        np.save(os.path.join(directory, f"{ticker}.npy"), bars)
+
+
+def symbol_universe(size=UNIVERSE_SIZE, seed=7):
+    """
+    Unique 1-5 letter symbols with multi-word company names.
+
+    Returns:
+        list: {"symbol", "name"} dicts.
+    """
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    symbols = set()
+    while len(symbols) < size:
+        symbols.add("".join(rng.choice(letters) for _ in range(rng.choice((1, 2, 3, 3, 4, 4, 4, 5)))))
+
+    return [
+        {"symbol": symbol, "name": f"{' '.join(rng.sample(_NAME_WORDS, 2))} {symbol} Inc".upper()}
+        for symbol in sorted(symbols)
+    ]
+
+
+def search_queries(stocks, count=2000, seed=11):
+    """
+    A mix of symbol prefixes, exact symbols and name fragments, like typed input.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        stock = rng.choice(stocks)
+        kind = rng.random()
+        if kind < 0.4:
+            text = stock["symbol"][:rng.randint(1, len(stock["symbol"]))]
+        elif kind < 0.6:
+            text = stock["symbol"]
+        else:
+            word = rng.choice(stock["name"].split())
+            text = word[:rng.randint(2, len(word))] if len(word) > 2 else word
+        queries.append(text.lower())
+    return queries
+
+
+def report_fixture(ticker, history, forecast_df, chart):
+    """
+    A complete report, as /api/report would return it.
+    """
+    price = float(history.iloc[-1])
+    words = " ".join(_NAME_WORDS)
+    return {
+        "ticker": ticker,
+        "company": f"{ticker} Holdings",
+        "marketData": {
+            "currentPrice": round(price, 2),
+            "marketCap": 1_000_000_000 * price,
+            "trailingPE": 24.5,
+            "fiftyTwoWeekHigh": float(history.iloc[-252:].max()),
+            "fiftyTwoWeekLow": float(history.iloc[-252:].min()),
+            "sector": "Technology",
+        },
+        "forecast": forecast_df.to_dict(orient="records"),
+        "mae": 1.84,
+        "priceChart": chart,
+        "news": {"summary": (words + ". ") * 6},
+        "swot": "\n".join(
+            f"## {section}\n" + ("- " + words + "\n") * 3
+            for section in ("Strengths", "Weaknesses", "Opportunities", "Threats")
+        ),
+        "recommendation": ("Hold. " + words + ". ") * 3,
+    }
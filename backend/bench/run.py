@@ -0,0 +1,539 @@
+"""
+Runs the offline benchmarks and writes machine-readable results.
+
+Everything runs inside a throwaway workspace (models, price store, caches and
+symbol snapshot are created there), with Yahoo, Serper, OpenAI and Finnhub
+replaced by the fakes in bench.fakes.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from bench import fakes, fixtures
+
+# The backend package root, so the app imports after we leave it for the workspace
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+
+ALL_BENCHMARKS = ("train", "forecast", "chart", "pdf", "search", "report", "cold_start")
+
+# Report stages, as named in app.routes.report.STAGE_TIMEOUTS, and the
+# (module, function) they run; the route imports them from there on each call
+REPORT_STAGES = {
+    "market_data": ("app.services.yfinance_client", "get_stock_data_from_yf"),
+    "news": ("app.routes.report", "_news_with_summary"),
+    "swot": ("app.services.openai_client", "generate_swot_analysis"),
+    "forecast": ("app.routes.report", "_forecast_with_chart"),
+    "recommendation": ("app.services.openai_client", "generate_investment_recommendation"),
+}
+
+# Runs in a fresh interpreter: imports the app, serves one request and
+# reports the timings and peak RSS in MB. Linux keeps ru_maxrss across exec
+# (it would report the benchmark's own peak), so VmHWM is read there instead.
+_COLD_START_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+status = app.test_client().get(sys.argv[1]).status_code
+elapsed = time.perf_counter() - start
+try:
+    with open("/proc/self/status") as f:
+        rss_mb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024
+except OSError:
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)  # macOS: bytes
+print(json.dumps({"import": imported - start, "first_response": elapsed, "status": status, "rss_mb": rss_mb}))
+"""
+
+
+class Recorder:
+    """
+    Collects timing samples (seconds) by metric name; safe to use from many threads.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def set(self, name, **values):
+        """
+        Records a non-latency result (throughput, sizes, ...).
+        """
+        self.values[name] = {k: round(v, 4) if isinstance(v, float) else v for k, v in values.items()}
+
+    def summary(self):
+        results = {name: summarize(samples) for name, samples in sorted(self.samples.items())}
+        results.update(self.values)
+        return results
+
+
+def summarize(samples):
+    """
+    Latency percentiles in milliseconds.
+    """
+    ms = np.asarray(samples) * 1000
+    return {
+        "count": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+class Workspace:
+    """
+    Prepares the throwaway working directory and hands out bench tickers,
+    each with a price history in the store and (on request) a model.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.root = tempfile.mkdtemp(prefix="genvest-bench-")
+        self.histories = {}
+        self._next = 0
+        self._base_booster = None
+
+    def enter(self):
+        os.chdir(self.root)
+        sys.path.insert(0, BACKEND_DIR)
+
+        # Keep the on-disk caches inside the workspace
+        os.environ.setdefault("COMPLETION_CACHE_DB", os.path.join(self.root, "data", "completions.sqlite"))
+
+        from ml.utils import last_trading_date
+        self.through = last_trading_date()
+        self.recorded = fixtures.recorded_histories(self.args.history_dir) if self.args.history_dir else None
+
+        # The symbol snapshot is read when the app is created
+        self.universe = fixtures.symbol_universe(self.args.universe_size)
+        os.makedirs("data", exist_ok=True)
+        with open(os.path.join("data", "symbols.json"), "w", encoding="utf-8") as f:
+            json.dump(self.universe, f)
+
+    def tickers(self, count, with_models=True):
+        """
+        Returns `count` new tickers with stored histories (and models).
+        """
+        from ml.price_store import PRICE_STORE_DIR
+
+        tickers = fixtures.bench_tickers(self._next + count)[self._next:]
+        self._next += count
+
+        histories = fixtures.histories_for(tickers, self.through, self.recorded)
+        fixtures.write_price_store(histories, PRICE_STORE_DIR)
+        self.histories.update(histories)
+
+        if with_models:
+            self.add_models(tickers)
+        return tickers
+
+    def add_models(self, tickers):
+        """
+        Gives every ticker a copy of one trained model (trained once, untimed).
+        """
+        from ml.registry import get_booster, model_info, save_model
+        from ml.train import train_and_save
+
+        if self._base_booster is None:
+            seed = self.tickers(1, with_models=False)[0]
+            train_and_save(seed)
+            self._base_booster = get_booster(seed)
+            self._base_info = model_info(seed)
+
+        for ticker in tickers:
+            save_model(
+                ticker, self._base_booster, mae=self._base_info["mae"], features=self._base_info["features"],
+                forecaster=self._base_info["forecaster"], feature_schema=self._base_info["feature_schema"],
+            )
+
+
+def bench_train(ws, rec, args):
+    from ml.train import train_and_save
+
+    for ticker in ws.tickers(args.train_tickers, with_models=False):
+        with rec.time("train.fast"):
+            train_and_save(ticker)
+    for ticker in ws.tickers(args.train_tickers, with_models=False)[:1]:
+        with rec.time("train.standard"):
+            train_and_save(ticker, fast=False)
+
+
+def bench_forecast(ws, rec, args):
+    from ml import predict
+
+    tickers = ws.tickers(args.forecast_tickers)
+
+    # Cold: every ticker loads its model and history for the first time
+    start = time.perf_counter()
+    for ticker in tickers:
+        with rec.time("forecast.cold"):
+            predict.forecast_prices(ticker)
+    rec.set("forecast.cold_throughput", tickers_per_s=len(tickers) / (time.perf_counter() - start))
+
+    # Warm: forecasts served from the cache
+    for ticker in tickers:
+        with rec.time("forecast.cached"):
+            predict.forecast_prices(ticker)
+
+    # Batch: one forecast_many call over every ticker with an empty forecast cache
+    predict._forecast_cache.clear()
+    start = time.perf_counter()
+    results = list(predict.forecast_many(tickers, 30))
+    elapsed = time.perf_counter() - start
+    rec.add("forecast.batch", elapsed)
+    rec.set("forecast.batch_throughput", tickers_per_s=len(results) / elapsed, tickers=len(results))
+
+
+def _chart_inputs(ws, ticker):
+    from ml.predict import forecast_prices
+
+    forecast_df, history_df = forecast_prices(ticker)
+    return history_df, forecast_df
+
+
+def bench_chart(ws, rec, args):
+    from app.utils import charts
+
+    ticker = ws.tickers(1)[0]
+    history_df, forecast_df = _chart_inputs(ws, ticker)
+
+    for _ in range(args.iterations):
+        # Measure rendering, not the chart cache
+        charts._chart_cache.clear()
+        with rec.time("chart.png"):
+            charts.plot_predictions(history_df, forecast_df)
+    for _ in range(args.iterations):
+        with rec.time("chart.cached"):
+            charts.plot_predictions(history_df, forecast_df)
+
+
+def bench_pdf(ws, rec, args):
+    from app.utils.charts import plot_predictions
+    from app.utils.pdf import generate_pdf_report, write_portfolio_pdf
+
+    tickers = ws.tickers(min(args.portfolio_size, 10))
+    reports = []
+    for ticker in tickers:
+        history_df, forecast_df = _chart_inputs(ws, ticker)
+        chart = plot_predictions(history_df, forecast_df)
+        reports.append(fixtures.report_fixture(ticker, ws.histories[ticker], forecast_df, chart))
+
+    size = 0
+    for _ in range(args.iterations):
+        with rec.time("pdf.report"):
+            size = len(generate_pdf_report(reports[0]))
+    rec.set("pdf.report_size", bytes=size)
+
+    # Portfolio packs repeat the fixture reports up to the requested size
+    pack = [reports[i % len(reports)] for i in range(args.portfolio_size)]
+    for _ in range(max(1, args.iterations // 5)):
+        with tempfile.TemporaryFile() as output, rec.time("pdf.portfolio"):
+            write_portfolio_pdf(pack, output)
+    rec.set("pdf.portfolio_size", reports=len(pack))
+
+
+def bench_search(ws, rec, args):
+    from app.utils.search_index import SymbolIndex
+    from app.main import app
+
+    start = time.perf_counter()
+    index = SymbolIndex(ws.universe)
+    rec.set("search.index_build", seconds=time.perf_counter() - start, symbols=len(ws.universe))
+
+    queries = fixtures.search_queries(ws.universe, args.search_queries)
+
+    # Index lookups alone
+    start = time.perf_counter()
+    for query in queries:
+        with rec.time("search.index"):
+            index.search(query, limit=10)
+    rec.set("search.index_qps", qps=len(queries) / (time.perf_counter() - start))
+
+    # Through the Flask endpoint (routing, JSON encoding)
+    client = app.test_client()
+    subset = queries[:max(1, len(queries) // 4)]
+    start = time.perf_counter()
+    for query in subset:
+        with rec.time("search.endpoint"):
+            client.get("/api/search", query_string={"q": query})
+    rec.set("search.endpoint_qps", qps=len(subset) / (time.perf_counter() - start))
+
+
+@contextmanager
+def _timed_stages(rec):
+    """
+    Wraps the functions behind each report stage so their run time is recorded.
+    """
+    targets = {stage: (importlib.import_module(module), name) for stage, (module, name) in REPORT_STAGES.items()}
+    originals = {stage: getattr(module, name) for stage, (module, name) in targets.items()}
+
+    def timed(stage, fn):
+        def wrapper(*args, **kwargs):
+            with rec.time(f"report.stage.{stage}"):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    for stage, (module, name) in targets.items():
+        setattr(module, name, timed(stage, originals[stage]))
+    try:
+        yield
+    finally:
+        for stage, (module, name) in targets.items():
+            setattr(module, name, originals[stage])
+
+
+def _post_report(client, ticker):
+    response = client.post("/api/report", json={"ticker": ticker, "openai_key": "bench", "serper_key": "bench"})
+    if response.status_code != 200:
+        raise RuntimeError(f"/api/report failed for {ticker}: {response.get_json()}")
+
+
+def bench_report(ws, rec, args):
+    from app.main import app
+
+    client = app.test_client()
+    tickers = ws.tickers(args.iterations)
+
+    with _timed_stages(rec):
+        # Cold: a new ticker each time, so no cache can answer
+        for ticker in tickers:
+            with rec.time("report.end_to_end.cold"):
+                _post_report(client, ticker)
+
+    # Warm: the same ticker again, served mostly from caches
+    for _ in range(args.iterations):
+        with rec.time("report.end_to_end.warm"):
+            _post_report(client, tickers[0])
+
+    # Streaming: time to the first event and to the end of the stream
+    for ticker in ws.tickers(args.iterations):
+        start = time.perf_counter()
+        response = client.post(
+            "/api/report/stream",
+            json={"ticker": ticker, "openai_key": "bench", "serper_key": "bench"},
+            buffered=False,
+        )
+        first = None
+        for _ in response.response:
+            if first is None:
+                first = time.perf_counter() - start
+        response.close()
+        rec.add("report.stream.first_event", first)
+        rec.add("report.stream.complete", time.perf_counter() - start)
+
+    # Throughput: concurrent clients each generating cold reports
+    concurrent = ws.tickers(args.concurrency * args.iterations)
+
+    def worker(chunk):
+        worker_client = app.test_client()
+        for ticker in chunk:
+            with rec.time("report.end_to_end.concurrent"):
+                _post_report(worker_client, ticker)
+
+    chunks = [concurrent[i::args.concurrency] for i in range(args.concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(worker, chunks))
+    rec.set(
+        "report.throughput",
+        reports_per_s=len(concurrent) / (time.perf_counter() - start),
+        concurrency=args.concurrency,
+    )
+
+
+def bench_cold_start(ws, rec, args):
+    """
+    Starts fresh interpreters and measures time to import the app and to
+    answer a first search request, plus peak RSS, with lazy loading (the
+    default) and with every subsystem preloaded (APP_PRELOAD=all).
+    """
+    for mode, preload in (("lazy", ""), ("preload", "all")):
+        env = dict(os.environ, APP_PRELOAD=preload, PYTHONPATH=BACKEND_DIR)
+        rss = []
+        for _ in range(args.cold_start_runs):
+            start = time.perf_counter()
+            output = subprocess.check_output(
+                [sys.executable, "-c", _COLD_START_SCRIPT, "/api/search?q=app"], cwd=ws.root, env=env, text=True
+            )
+            rec.add(f"cold_start.{mode}.process", time.perf_counter() - start)
+
+            run = json.loads(output.strip().splitlines()[-1])
+            if run["status"] != 200:
+                raise RuntimeError(f"Cold start request failed with status {run['status']}")
+            rec.add(f"cold_start.{mode}.import", run["import"])
+            rec.add(f"cold_start.{mode}.first_response", run["first_response"])
+            rss.append(run["rss_mb"])
+
+        rec.set(f"cold_start.{mode}.rss", max_rss_mb=float(np.median(rss)))
+
+
+BENCHMARKS = {
+    "train": bench_train,
+    "forecast": bench_forecast,
+    "chart": bench_chart,
+    "pdf": bench_pdf,
+    "search": bench_search,
+    "report": bench_report,
+    "cold_start": bench_cold_start,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """
+    Prints metric changes against a baseline run.
+
+    Latency metrics compare p50 and p95 and memory compares peak RSS (lower
+    is better); throughput metrics compare their rate (higher is better).
+
+    Returns:
+        list: Names of metrics that regressed by more than `threshold` (a fraction).
+    """
+    regressions = []
+    print(f"\n{'Metric':<40} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+
+        for field in ("p50_ms", "p95_ms", "max_rss_mb", "qps", "tickers_per_s", "reports_per_s"):
+            if field not in now or field not in before or not before[field]:
+                continue
+            change = (now[field] - before[field]) / before[field]
+            lower_is_better = field.endswith(("_ms", "_mb"))
+            worse = change > threshold if lower_is_better else change < -threshold
+            flag = "  <-- regression" if worse else ""
+            print(f"{name + '.' + field:<40} {before[field]:>12.3f} {now[field]:>12.3f} {change:>+8.1%}{flag}")
+            if worse:
+                regressions.append(f"{name}.{field}")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline GenVest benchmarks.")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(ALL_BENCHMARKS)}")
+    parser.add_argument("--iterations", type=int, default=10, help="Samples per latency benchmark")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel clients for report throughput")
+    parser.add_argument("--forecast-tickers", type=int, default=50, help="Tickers in the forecast benchmarks")
+    parser.add_argument("--train-tickers", type=int, default=2, help="Tickers trained in fast mode")
+    parser.add_argument("--portfolio-size", type=int, default=20, help="Reports per portfolio PDF")
+    parser.add_argument("--search-queries", type=int, default=2000, help="Queries in the search benchmark")
+    parser.add_argument("--universe-size", type=int, default=fixtures.UNIVERSE_SIZE, help="Symbols in the search universe")
+    parser.add_argument("--cold-start-runs", type=int, default=5, help="Fresh processes started per cold-start mode")
+    parser.add_argument("--history-dir", help="Directory of recorded price-store .npy files to use instead of synthetic walks")
+    for service, seconds in fakes.DEFAULT_LATENCY.items():
+        parser.add_argument(f"--{service}-latency", type=float, default=seconds,
+                            help=f"Simulated {service} latency in seconds (default {seconds})")
+    parser.add_argument("--keep-workspace", action="store_true", help="Keep the temporary workspace for inspection")
+    parser.add_argument("--output", help="Results file (default bench/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if any metric regressed")
+    args = parser.parse_args(argv)
+
+    selected = args.only.split(",") if args.only else list(ALL_BENCHMARKS)
+    unknown = set(selected) - set(ALL_BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    # Resolve paths before leaving the current directory
+    output = os.path.abspath(args.output) if args.output else os.path.join(
+        RESULTS_DIR, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    if args.history_dir:
+        args.history_dir = os.path.abspath(args.history_dir)
+
+    latency = {service: getattr(args, f"{service}_latency") for service in fakes.DEFAULT_LATENCY}
+
+    ws = Workspace(args)
+    ws.enter()
+    fakes.install(ws.histories, ws.universe, latency)
+
+    rec = Recorder()
+    try:
+        for name in ALL_BENCHMARKS:
+            if name in selected:
+                print(f"⏱️ Running {name} benchmark...")
+                BENCHMARKS[name](ws, rec, args)
+    finally:
+        os.chdir(BACKEND_DIR)
+        if not args.keep_workspace:
+            shutil.rmtree(ws.root, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "benchmarks": [name for name in ALL_BENCHMARKS if name in selected],
+            "latency": latency,
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "keep_workspace")},
+        },
+        "results": rec.summary(),
+    }
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    # Short human-readable table
+    print(f"\n{'Metric':<40} {'p50 ms':>10} {'p95 ms':>10} {'n':>6}")
+    for name, stats in results["results"].items():
+        if "p50_ms" in stats:
+            print(f"{name:<40} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f} {stats['count']:>6}")
+        else:
+            print(f"{name:<40} {json.dumps(stats)}")
+    print(f"\nResults written to {output}")
+
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
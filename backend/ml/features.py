@@ -0,0 +1,240 @@
+"""
+Feature engine shared by training and prediction.
+
+Every model input is built from a window of the most recent closes:
+
+    lag_1 ... lag_N     the N closes before the predicted day (lag_1 is the latest)
+    rolling_mean_3      mean of lag_1..lag_3
+    rolling_std_5       sample standard deviation of lag_1..lag_5
+
+Training, one-shot prediction and the recursive forecaster all go through
+`window_features`, so the layout cannot drift between them. The layout is
+declared by `feature_schema`, stored with each model and checked before the
+model is used.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Number of lag features (lag_1 ... lag_10)
+LAGS = 10
+
+# Bump whenever the meaning or order of the features changes. Version 1 (the
+# original build_features) computed the rolling statistics over a window that
+# included the predicted day's own close.
+SCHEMA_VERSION = 2
+
+# Feature matrices are built directly in XGBoost's native input type
+DTYPE = np.float32
+
+
+class FeatureSchemaError(FileNotFoundError):
+    """
+    Raised when a model was trained on a different feature layout than the one
+    built here. It subclasses FileNotFoundError so callers that train missing
+    models (report forecasts, training jobs) retrain it the same way.
+    """
+
+
+def feature_names(forecaster="recursive", lags=LAGS):
+    """
+    Ordered input names of a model.
+    """
+    names = [f"lag_{i}" for i in range(1, lags + 1)] + ["rolling_mean_3", "rolling_std_5"]
+    if forecaster == "direct":
+        return [f"{name}_rel" for name in names] + ["horizon"]
+    return names
+
+
+def feature_schema(forecaster="recursive", lags=LAGS):
+    """
+    Declared input layout of a model, saved in its manifest entry.
+
+    Returns:
+        dict: {"version", "forecaster", "lags", "dtype", "features"}
+    """
+    return {
+        "version": SCHEMA_VERSION,
+        "forecaster": forecaster,
+        "lags": lags,
+        "dtype": np.dtype(DTYPE).name,
+        "features": feature_names(forecaster, lags),
+    }
+
+
+def check_schema(ticker, info):
+    """
+    Ensures a model's recorded schema matches the features built here.
+
+    Parameters:
+        ticker (str): Ticker the model belongs to (for the error message).
+        info (dict): The model's manifest entry.
+
+    Raises:
+        FeatureSchemaError: If the model was trained on another layout (or
+            predates schemas) and has to be retrained.
+    """
+    info = info or {}
+    expected = feature_schema(info.get("forecaster", "recursive"))
+    found = info.get("feature_schema")
+    if found != expected:
+        version = (found or {}).get("version", 1)
+        raise FeatureSchemaError(
+            f"Model for {ticker} uses feature schema v{version}, expected v{SCHEMA_VERSION}; it must be retrained"
+        )
+
+
+def lag_windows(prices, lags=LAGS):
+    """
+    Read-only view of every `lags`-long window of closes, newest first; no data is copied.
+
+    Parameters:
+        prices (np.ndarray): Closes, oldest first, along the last axis.
+
+    Returns:
+        np.ndarray: Shape (..., n - lags + 1, lags); window i ends on day i + lags - 1.
+    """
+    return sliding_window_view(np.asarray(prices, dtype=np.float64), lags, axis=-1)[..., ::-1]
+
+
+def window_features(windows, out=None):
+    """
+    Feature rows from lag windows (newest first, as from lag_windows).
+
+    Parameters:
+        windows (np.ndarray): Shape (..., lags).
+        out (np.ndarray): Optional float32 array of shape (..., lags + 2) to fill in place.
+
+    Returns:
+        np.ndarray: float32 rows: lags, 3-day mean, 5-day standard deviation.
+    """
+    lags = windows.shape[-1]
+    if out is None:
+        out = np.empty(windows.shape[:-1] + (lags + 2,), dtype=DTYPE)
+
+    out[..., :lags] = windows
+    out[..., lags] = windows[..., :3].mean(axis=-1)
+    out[..., lags + 1] = windows[..., :5].std(axis=-1, ddof=1)
+    return out
+
+
+def training_frame(history_df, lags=LAGS):
+    """
+    Builds the training set of a recursive model without touching the input.
+
+    Parameters:
+        history_df (pd.DataFrame): 'price' column indexed by date.
+
+    Returns:
+        tuple: (X, y) where X is a float32 DataFrame of feature rows and y the
+               close each row predicts, both indexed by the predicted day.
+    """
+    prices = history_df["price"].to_numpy(dtype=np.float64)
+    if len(prices) <= lags:
+        return (
+            pd.DataFrame(np.empty((0, lags + 2), dtype=DTYPE), columns=feature_names(lags=lags)),
+            pd.Series(np.empty(0, dtype=DTYPE), name="price"),
+        )
+
+    # The window ending the day before each predicted day
+    X = window_features(lag_windows(prices[:-1], lags))
+    index = history_df.index[lags:]
+    return (
+        pd.DataFrame(X, index=index, columns=feature_names(lags=lags), copy=False),
+        pd.Series(prices[lags:].astype(DTYPE), index=index, name="price"),
+    )
+
+
+def direct_features(origins, horizons):
+    """
+    Inputs of a direct multi-horizon model: origin feature rows scaled by the
+    origin's close, so one model serves any price level, followed by the
+    horizon in days. Direct models predict the return over the horizon.
+
+    Parameters:
+        origins (np.ndarray): Feature rows for the day after each origin, shape (n, lags + 2).
+        horizons (np.ndarray): Days ahead for each row, shape (n,).
+
+    Returns:
+        np.ndarray: float32, shape (n, lags + 3).
+    """
+    close = origins[:, :1]
+    out = np.empty((len(origins), origins.shape[1] + 1), dtype=DTYPE)
+    np.divide(origins[:, :-1], close, out=out[:, :-2])
+    out[:, :-2] -= 1.0                                   # Lags and 3-day mean relative to the close
+    np.divide(origins[:, -1:], close, out=out[:, -2:-1])  # 5-day volatility relative to the close
+    out[:, -1] = horizons
+    return out
+
+
+def direct_training_set(prices, horizon, lags=LAGS):
+    """
+    Stacks one training row per (origin day, horizon) pair, with the return to
+    the close `horizon` sessions after the origin as the target.
+
+    Parameters:
+        prices (np.ndarray): Closes, oldest first.
+        horizon (int): Largest horizon in days.
+
+    Returns:
+        tuple: (X, y, origin index of each row, horizon of each row, close on each row's origin)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+
+    # Origins are every day with a full window and at least one later close
+    origins = window_features(lag_windows(prices[:-1], lags))
+    closes = prices[lags - 1:-1]
+    n_origins = len(origins)
+
+    # Rows for horizon h cover the origins that have a close h sessions later
+    counts = np.clip(n_origins - np.arange(horizon), 0, None)
+    counts = counts[counts > 0]
+    origin_idx = np.concatenate([np.arange(count) for count in counts])
+    horizons = np.repeat(np.arange(1, len(counts) + 1), counts)
+
+    X = direct_features(origins[origin_idx], horizons)
+    y = prices[lags - 1 + origin_idx + horizons] / closes[origin_idx] - 1.0
+    return X, y.astype(DTYPE), origin_idx, horizons, closes[origin_idx]
+
+
+class FeatureStream:
+    """
+    Feature rows for several series that advance day by day as predictions are
+    appended. Each push writes the new closes into a preallocated buffer and
+    refreshes only the current row of each series.
+
+    Parameters:
+        prices (np.ndarray): Recent closes, oldest first, shape (n, >= lags).
+        capacity (int): Most closes that will be pushed.
+        lags (int): Number of lag features.
+    """
+
+    def __init__(self, prices, capacity, lags=LAGS):
+        prices = np.asarray(prices, dtype=np.float64)
+        prices = prices.reshape(1, -1) if prices.ndim == 1 else prices
+
+        self.lags = lags
+        self._closes = np.empty((prices.shape[0], lags + capacity), dtype=np.float64)
+        self._closes[:, :lags] = prices[:, -lags:]
+        self._end = lags
+
+        # Features for the day after the latest close, shape (n, lags + 2)
+        self.rows = np.empty((prices.shape[0], lags + 2), dtype=DTYPE)
+        self._refresh()
+
+    @property
+    def last_close(self):
+        return self._closes[:, self._end - 1]
+
+    def _refresh(self):
+        window_features(self._closes[:, self._end - self.lags:self._end][:, ::-1], out=self.rows)
+
+    def push(self, closes):
+        """
+        Appends one close per series (shape (n,)) or several (shape (n, k)).
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        closes = closes.reshape(-1, 1) if closes.ndim == 1 else closes
+        self._closes[:, self._end:self._end + closes.shape[1]] = closes
+        self._end += closes.shape[1]
+        self._refresh()
@@ -0,0 +1,159 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from app.utils.metrics import stage_duration, stage_errors
+from ml.registry import MODELS_DIR, model_info, model_version
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process de-duplication
+    fcntl = None
+
+# Number of models trained in parallel by this process
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "2"))
+
+# Lazily created pool; spawned (not forked) children keep XGBoost/OpenMP and the
+# web server's threads out of each other's way
+_executor = None
+_executor_lock = threading.Lock()
+
+# Latest job per ticker; an unfinished job absorbs duplicate requests
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class TrainingJob:
+    """
+    Tracks one background training run for a ticker.
+    """
+
+    def __init__(self, ticker, future):
+        self.ticker = ticker
+        self.future = future
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def status(self):
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        return "failed" if self.future.exception() else "done"
+
+    def to_dict(self):
+        data = {
+            "ticker": self.ticker,
+            "status": self.status,
+            "submittedAt": self.submitted_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.status == "done":
+            data["mae"] = self.future.result()
+        elif self.status == "failed":
+            data["error"] = str(self.future.exception())
+        return data
+
+
+def _get_executor(replace_broken=False):
+    global _executor
+    with _executor_lock:
+        if replace_broken and _executor is not None:
+            # A worker died (e.g. OOM-killed); start over with a fresh pool
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=TRAINING_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _current_version(ticker):
+    try:
+        return model_version(ticker)
+    except FileNotFoundError:
+        return None
+
+
+def _train_job(ticker, known_version, forecaster=None):
+    """
+    Runs in a pool process. Training is serialized per ticker across every
+    process on the host; if another process finished a model for this ticker
+    while we waited, its result is reused instead of training again.
+
+    Returns:
+        float: Validation MAE of the model now on disk.
+    """
+    # Imported lazily so the web process never loads the training stack itself
+    from ml.train import train_and_save
+
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    with open(os.path.join(MODELS_DIR, f"{ticker}.train.lock"), "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        if _current_version(ticker) != known_version:
+            info = model_info(ticker) or {}
+            return info.get("mae")
+
+        return train_and_save(ticker, forecaster=forecaster)
+
+
+def submit_training(ticker, forecaster=None):
+    """
+    Queues a training run for a ticker, or returns the one already in progress.
+    `forecaster` ("recursive" or "direct") defaults to the ticker's current one.
+
+    Returns:
+        TrainingJob: The job responsible for training the ticker.
+    """
+    with _jobs_lock:
+        job = _jobs.get(ticker)
+        if job is not None and not job.future.done():
+            return job
+
+        known_version = _current_version(ticker)
+        try:
+            future = _get_executor().submit(_train_job, ticker, known_version, forecaster)
+        except BrokenProcessPool:
+            future = _get_executor(replace_broken=True).submit(_train_job, ticker, known_version, forecaster)
+        job = TrainingJob(ticker, future)
+        _jobs[ticker] = job
+
+    def on_done(_):
+        job.finished_at = time.time()
+        # Training runs in another process, so it is timed here from submission to completion
+        stage_duration.observe(job.finished_at - job.submitted_at, stage="training")
+        if future.cancelled() or future.exception() is not None:
+            stage_errors.inc(stage="training")
+        # Drop any forecasts this process cached for the previous model
+        # (imported here so queueing a job does not load the forecasting stack)
+        from ml.predict import invalidate_forecasts
+        invalidate_forecasts(ticker)
+
+    future.add_done_callback(on_done)
+    return job
+
+
+def get_job(ticker):
+    """
+    Returns the most recent training job for a ticker, or None.
+    """
+    with _jobs_lock:
+        return _jobs.get(ticker)
+
+
+def wait_for_training(ticker, timeout):
+    """
+    Ensures a model is being trained for the ticker and waits up to `timeout` seconds.
+
+    Returns:
+        TrainingJob: The job; check `status` to see whether it finished in time.
+    """
+    job = submit_training(ticker)
+    wait([job.future], timeout=max(timeout, 0))
+    return job
@@ -1,17 +1,167 @@
+import numpy as np
 import pandas as pd
-import joblib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
-from ml.utils import fetch_stock_history, build_features
+from app.utils.cache import LRUCache, SQLiteCache, TieredCache, MISSING
+from app.utils.singleflight import SingleFlight
+from app.utils.metrics import timed_stage, register_cache
+from ml.registry import get_booster, model_info, model_version
+from ml.utils import fetch_stock_history, fetch_many_histories, last_trading_date
+from ml.features import LAGS, FeatureStream, direct_features, check_schema
 import os
 
-# In-memory cache for storing previously computed forecasts
-# Structure: { ticker: (forecast_df, historical_df) }
-_prediction_cache = {}
+def _frames_nbytes(value):
+    """
+    Approximate memory footprint of a cached (forecast_df, historical_df) pair.
+    """
+    return sum(int(df.memory_usage(deep=True).sum()) for df in value)
+
+# Cache for previously computed forecasts
+# Key: "{ticker}:{last trading date}:{horizon}:{model version}"
+# Value: (forecast_df, historical_df)
+_forecast_cache = TieredCache(
+    LRUCache(
+        max_entries=int(os.getenv("FORECAST_CACHE_SIZE", "512")),
+        ttl=24 * 60 * 60,
+        max_bytes=int(float(os.getenv("FORECAST_CACHE_MAX_MB", "64")) * 1024 * 1024),
+        sizeof=_frames_nbytes,
+    ),
+    # Optional on-disk cache shared by all worker processes
+    SQLiteCache(os.getenv("FORECAST_CACHE_DB"), ttl=24 * 60 * 60)
+    if os.getenv("FORECAST_CACHE_DB") else None,
+)
+
+# Forecasts being computed right now, keyed like the cache
+_forecast_flights = SingleFlight()
+
+# Export hit/miss counters at /metrics
+register_cache("forecast", _forecast_cache)
+register_cache("forecast_singleflight", _forecast_flights)
+
+
+def _recursive_forecast(booster, price_windows, steps, lags=LAGS):
+    """
+    Predicts `steps` days ahead by feeding each prediction back in as the newest lag.
+
+    Each step appends the prediction to a FeatureStream, which refreshes the
+    feature rows in place with the same code that builds the training set.
+
+    Parameters:
+        booster (xgboost.Booster): Trained model.
+        price_windows (np.ndarray): Most recent closes, oldest first, shape (n, >= lags).
+            Each row is forecast independently.
+        steps (int): Number of days to predict.
+        lags (int): Number of lag features.
+
+    Returns:
+        np.ndarray: Predicted prices with shape (n, steps).
+    """
+    stream = FeatureStream(price_windows, steps, lags)
+    predictions = np.empty((stream.rows.shape[0], steps), dtype=np.float64)
+
+    for step in range(steps):
+        pred = booster.inplace_predict(stream.rows, validate_features=False)
+        predictions[:, step] = pred
+        stream.push(pred)
+
+    return predictions
+
+
+def _direct_forecast(booster, price_windows, steps, horizon, lags=LAGS):
+    """
+    Predicts `steps` days ahead with a direct model (trained on returns, with
+    the horizon as its last feature): every day up to the model's horizon comes
+    from one predict call. Longer forecasts continue from the predicted closes, one call
+    per `horizon` days.
+
+    Parameters:
+        booster (xgboost.Booster): Direct model.
+        price_windows (np.ndarray): Most recent closes, oldest first, shape (n, >= lags).
+            Each row is forecast independently.
+        steps (int): Number of days to predict.
+        horizon (int): Days ahead the model was trained for.
+        lags (int): Number of lag features.
+
+    Returns:
+        np.ndarray: Predicted prices with shape (n, steps).
+    """
+    stream = FeatureStream(price_windows, steps, lags)
+    n_rows = stream.rows.shape[0]
+    predictions = np.empty((n_rows, steps), dtype=np.float64)
+
+    done = 0
+    while done < steps:
+        block = min(horizon, steps - done)
+
+        # One row per (series, horizon): the series' origin features plus h = 1..block
+        rows = direct_features(
+            np.repeat(stream.rows, block, axis=0),
+            np.tile(np.arange(1, block + 1), n_rows),
+        )
+        returns = booster.inplace_predict(rows, validate_features=False).reshape(n_rows, block)
+        predictions[:, done:done + block] = stream.last_close[:, None] * (1.0 + returns)
+
+        stream.push(predictions[:, done:done + block])
+        done += block
+
+    return predictions
+
+
+def _predict(booster, info, price_windows, steps):
+    """
+    Runs the forecaster the model was trained for (recorded in its manifest entry).
+    """
+    if (info or {}).get("forecaster") == "direct":
+        return _direct_forecast(booster, price_windows, steps, info.get("horizon", steps))
+    return _recursive_forecast(booster, price_windows, steps)
+
+
+def _forecast_cache_key(ticker, horizon):
+    """
+    Builds the cache key for a forecast. A new trading day, a different horizon
+    or a retrained model all produce a new key, so stale entries are never served.
+
+    Raises:
+        FileNotFoundError: If no model has been trained for the ticker.
+    """
+    return f"{ticker}:{last_trading_date().isoformat()}:{horizon}:{model_version(ticker)}"
+
+
+def invalidate_forecasts(ticker):
+    """
+    Drops every cached forecast for a ticker (e.g. after retraining its model).
+    """
+    _forecast_cache.delete_prefix(f"{ticker}:")
+
+
+def forecast_cache_stats():
+    """
+    Returns hit/miss counters and entry counts for the forecast cache.
+    """
+    return _forecast_cache.stats_dict()
+
+
+def _format_forecast(last_date, predictions):
+    """
+    Pairs predicted prices with the calendar days following `last_date`.
+
+    Returns:
+        pd.DataFrame: Columns 'date' and 'predicted_price'.
+    """
+    return pd.DataFrame([
+        {
+            "date": last_date + timedelta(days=i + 1),
+            "predicted_price": float(pred)
+        }
+        for i, pred in enumerate(predictions)
+    ])
+
 
 def forecast_prices(ticker: str, forecast_days: int = 30):
     """
     Generates a forecast of future stock prices using a pre-trained model.
-    Uses a recursive approach to predict prices day by day.
+    Recursive models predict day by day; direct models predict the whole
+    horizon at once (see ml.registry.FORECASTERS).
 
     Parameters:
         ticker (str): The stock ticker symbol.
@@ -23,57 +173,144 @@ def forecast_prices(ticker: str, forecast_days: int = 30):
             - historical_df: DataFrame of historical prices used for context
     """
     # Return cached result if available
-    if ticker in _prediction_cache:
+    cache_key = _forecast_cache_key(ticker, forecast_days)
+    cached = _forecast_cache.get(cache_key)
+    if cached is not MISSING:
         print(f"✅ Cache hit for {ticker}")
-        return _prediction_cache[ticker]
+        return cached
 
+    # Concurrent requests for the same forecast wait for a single computation
+    return _forecast_flights.do(cache_key, _generate_forecast, ticker, forecast_days, cache_key)
+
+
+@timed_stage("forecast_compute")
+def _generate_forecast(ticker, forecast_days, cache_key):
+    """
+    Computes a forecast (see forecast_prices) and caches it under `cache_key`.
+    """
     print(f"🚀 Generating forecast for {ticker}")
 
-    # Fetch and prepare historical data
-    df = fetch_stock_history(ticker)
-    df = build_features(df)
+    # Fetch historical data
+    df = fetch_stock_history(ticker)[["price"]]
+    if len(df) < LAGS:
+        raise ValueError(f"Not enough price history for ticker: {ticker}")
+
+    # Load pre-trained model (models built for another feature layout are rejected)
+    booster = get_booster(ticker)
+    info = model_info(ticker)
+    check_schema(ticker, info)
+
+    # Predict forward from the last known closes
+    last_prices = df["price"].to_numpy(dtype=np.float64)[-LAGS:]
+    predictions = _predict(booster, info, last_prices, forecast_days)[0]
 
-    # Load pre-trained model
-    model_path = f"ml/models/{ticker}.pkl"
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found for ticker: {ticker}. Please train it first.")
+    # Format forecast output
+    forecast_df = _format_forecast(df.index[-1], predictions)
+
+    # Cache the forecast and historical data
+    _forecast_cache.set(cache_key, (forecast_df, df))
     
-    model = joblib.load(model_path)
+    return forecast_df, df
 
-    # Initialize forecast with last known data point
-    last_known = df.iloc[-1:].copy()
-    forecasts = []
-    last_date = df.index[-1]
 
-    # Predict recursively one day at a time
-    for i in range(forecast_days):
-        features = last_known.drop(columns=['price'])
-        pred = model.predict(features)[0]
+def _forecast_group(model_key, tickers, features, horizon):
+    """
+    Forecasts every ticker that shares one model with a single predict call per step.
 
-        forecasts.append({
-            "date": last_date + timedelta(days=i + 1),
-            "predicted_price": float(pred)
-        })
+    Parameters:
+        model_key (str): Ticker whose model is used.
+        tickers (list): Tickers in the group.
+        features (dict): { ticker: (last LAGS closes, history_df, cache key) }.
+        horizon (int): Number of days to predict.
 
-        # Create new row using prediction and updated lag/rolling features
-        new_row = last_known.copy()
-        new_row['price'] = pred
+    Returns:
+        list: (ticker, (forecast_df, history_df)) pairs.
+    """
+    booster = get_booster(model_key)
+    info = model_info(model_key)
+    check_schema(model_key, info)
 
-        # Update lag features
-        for lag in range(10, 1, -1):
-            new_row[f"lag_{lag}"] = new_row[f"lag_{lag-1}"]
-        new_row["lag_1"] = pred
+    windows = np.vstack([features[t][0] for t in tickers])
+    predictions = _predict(booster, info, windows, horizon)
 
-        # Recalculate rolling statistics
-        new_row["rolling_mean_3"] = new_row[[f"lag_{i}" for i in range(1, 4)]].mean(axis=1)
-        new_row["rolling_std_5"] = new_row[[f"lag_{i}" for i in range(1, 6)]].std(axis=1)
+    results = []
+    for ticker, preds in zip(tickers, predictions):
+        _, history_df, cache_key = features[ticker]
+        forecast_df = _format_forecast(history_df.index[-1], preds)
+        _forecast_cache.set(cache_key, (forecast_df, history_df))
+        results.append((ticker, (forecast_df, history_df)))
+    return results
 
-        last_known = new_row
 
-    # Format forecast output
-    forecast_df = pd.DataFrame(forecasts)
+def forecast_many(tickers, horizon: int = 30, max_workers: int = None):
+    """
+    Forecasts a batch of tickers, yielding each result as soon as it is ready.
 
-    # Cache the forecast and historical data
-    _prediction_cache[ticker] = (forecast_df, df[["price"]])
-    
-    return forecast_df, df[["price"]]
+    Price history for all uncached tickers is downloaded in one bulk request.
+    Tickers are then grouped by the model that serves them so that each
+    recursive step (or the single direct-model call) runs one vectorized
+    predict per model, and groups run concurrently on a thread pool.
+
+    Parameters:
+        tickers (list): Stock ticker symbols (duplicates are forecast once).
+        horizon (int): Number of days into the future to predict.
+        max_workers (int): Thread pool size (defaults to the CPU count).
+
+    Yields:
+        tuple: (ticker, (forecast_df, historical_df), None) on success,
+               or (ticker, None, error message) on failure.
+    """
+    tickers = list(dict.fromkeys(tickers))
+
+    # Serve cached forecasts straight away; tickers without a model fail early
+    pending = {}
+    for ticker in tickers:
+        try:
+            cache_key = _forecast_cache_key(ticker, horizon)
+        except FileNotFoundError as e:
+            yield ticker, None, str(e)
+            continue
+
+        cached = _forecast_cache.get(cache_key)
+        if cached is not MISSING:
+            yield ticker, cached, None
+        else:
+            pending[ticker] = cache_key
+
+    if not pending:
+        return
+
+    # Bulk-download history and keep the last LAGS closes of each ticker
+    histories = fetch_many_histories(list(pending))
+    features = {}
+    for ticker in pending:
+        if ticker not in histories:
+            yield ticker, None, f"No price history found for ticker: {ticker}"
+            continue
+
+        df = histories[ticker][["price"]]
+        if len(df) < LAGS:
+            yield ticker, None, f"Not enough price history for ticker: {ticker}"
+            continue
+
+        last_prices = df["price"].to_numpy(dtype=np.float64)[-LAGS:]
+        features[ticker] = (last_prices, df, pending[ticker])
+
+    # Group tickers by the model that serves them (models are trained per ticker)
+    groups = {}
+    for ticker in features:
+        groups.setdefault(ticker, []).append(ticker)
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {
+            executor.submit(_forecast_group, model_key, group, features, horizon): group
+            for model_key, group in groups.items()
+        }
+
+        for future in as_completed(futures):
+            try:
+                for ticker, result in future.result():
+                    yield ticker, result, None
+            except Exception as e:
+                for ticker in futures[future]:
+                    yield ticker, None, str(e)
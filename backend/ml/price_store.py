@@ -0,0 +1,263 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from app.utils.metrics import external_call
+from ml.utils import last_trading_date, MARKET_TZ
+
+# Directory holding one memory-mappable .npy file of daily closes per ticker
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", os.path.join("ml", "data", "prices"))
+
+# Minimum time between network checks for a ticker that is behind the calendar
+# (covers exchange holidays and data that Yahoo publishes late)
+RECHECK_SECONDS = int(os.getenv("PRICE_STORE_RECHECK_SECONDS", "900"))
+
+# Relative difference on the overlapping bar that indicates Yahoo re-adjusted
+# the history (split or dividend), which forces a full re-download
+ADJUSTMENT_TOLERANCE = 1e-4
+
+# Record layout: one row per completed trading session
+BAR_DTYPE = np.dtype([("date", "datetime64[D]"), ("price", "float64")])
+
+# Per-ticker locks so a process never syncs the same ticker twice at once
+_sync_locks = {}
+_sync_locks_guard = threading.Lock()
+
+
+def _path(ticker):
+    return os.path.join(PRICE_STORE_DIR, f"{ticker}.npy")
+
+
+def _lock_for(ticker):
+    with _sync_locks_guard:
+        return _sync_locks.setdefault(ticker, threading.Lock())
+
+
+def load_bars(ticker):
+    """
+    Memory-maps the stored bars for a ticker.
+
+    Returns:
+        np.ndarray or None: Structured array of (date, price), oldest first,
+        or None if the ticker has never been stored.
+    """
+    try:
+        return np.load(_path(ticker), mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_bars(ticker, bars):
+    """
+    Replaces the stored bars for a ticker atomically (temp file + rename).
+    """
+    os.makedirs(PRICE_STORE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=PRICE_STORE_DIR, prefix=f".{ticker}-", suffix=".npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, bars)
+        os.replace(tmp_path, _path(ticker))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _to_bars(close, through):
+    """
+    Converts a Yahoo close-price series into completed-session bars.
+
+    Parameters:
+        close (pd.Series): Closing prices indexed by (possibly tz-aware) timestamps.
+        through (datetime.date): Last completed session; later (partial) bars are dropped.
+
+    Returns:
+        np.ndarray: Structured bar array sorted by date.
+    """
+    close = close.dropna()
+    index = pd.DatetimeIndex(close.index)
+    if index.tz is not None:
+        # Keep the exchange-local session date
+        index = index.tz_localize(None)
+
+    dates = index.normalize().to_numpy().astype("datetime64[D]")
+    keep = dates <= np.datetime64(through, "D")
+
+    bars = np.empty(int(keep.sum()), dtype=BAR_DTYPE)
+    bars["date"] = dates[keep]
+    bars["price"] = close.to_numpy(dtype=np.float64)[keep]
+    return bars
+
+
+def _needs_sync(ticker, bars, through):
+    """
+    Decides whether a ticker's stored bars should be refreshed from Yahoo:
+    they are behind the last completed session and were not checked recently.
+    """
+    if bars is None or len(bars) == 0:
+        return True
+    if bars["date"][-1] >= np.datetime64(through, "D"):
+        return False
+
+    # The file's mtime doubles as the time of the last network check
+    return time.time() - os.path.getmtime(_path(ticker)) >= RECHECK_SECONDS
+
+
+def _merge(bars, fresh):
+    """
+    Appends newly downloaded bars to the stored ones.
+
+    The download starts at the last stored session, so the two overlap by one
+    bar. If that bar's price changed, Yahoo has re-adjusted the history and
+    the stored bars can no longer be extended.
+
+    Returns:
+        np.ndarray or None: Merged bars, or None if a full re-download is needed.
+    """
+    if bars is None or len(bars) == 0:
+        return fresh
+    if len(fresh) == 0:
+        return bars
+
+    last = bars[-1]
+    overlap = fresh[fresh["date"] == last["date"]]
+    if len(overlap) and abs(overlap["price"][0] - last["price"]) > ADJUSTMENT_TOLERANCE * abs(last["price"]):
+        return None
+
+    return np.concatenate([bars[bars["date"] < fresh["date"][0]], fresh])
+
+
+def _download(ticker, start=None):
+    """
+    Downloads daily closes for one ticker, from `start` (inclusive) or the full history.
+    """
+    stock = yf.Ticker(ticker)
+    with external_call("yahoo"):
+        if start is None:
+            return stock.history(period="max")["Close"]
+        return stock.history(start=start)["Close"]
+
+
+def _store(ticker, bars, merged):
+    """
+    Persists merged bars, or just records the check when nothing changed.
+    """
+    if merged is bars:
+        if bars is not None:
+            os.utime(_path(ticker))
+        return
+    if len(merged):
+        _write_bars(ticker, merged)
+
+
+def sync(ticker):
+    """
+    Brings a ticker's stored history up to the last completed session,
+    downloading only the days that are missing.
+
+    Returns:
+        np.ndarray or None: The ticker's bars after syncing (None if Yahoo has no data).
+    """
+    with _lock_for(ticker):
+        through = last_trading_date()
+        bars = load_bars(ticker)
+        if not _needs_sync(ticker, bars, through):
+            return bars
+
+        start = None if bars is None or len(bars) == 0 else bars["date"][-1].item()
+        merged = _merge(bars, _to_bars(_download(ticker, start), through))
+
+        if merged is None:
+            # History was re-adjusted (split/dividend): replace it entirely
+            merged = _to_bars(_download(ticker), through)
+
+        _store(ticker, bars, merged)
+        return load_bars(ticker)
+
+
+def sync_many(tickers):
+    """
+    Syncs several tickers, batching the downloads of tickers that are missing
+    the same range into a single bulk request.
+    """
+    through = last_trading_date()
+
+    # Group stale tickers by the date their download has to start from
+    groups = {}
+    for ticker in dict.fromkeys(tickers):
+        bars = load_bars(ticker)
+        if _needs_sync(ticker, bars, through):
+            start = None if bars is None or len(bars) == 0 else bars["date"][-1].item()
+            groups.setdefault(start, []).append((ticker, bars))
+
+    for start, members in groups.items():
+        symbols = [ticker for ticker, _ in members]
+        with external_call("yahoo"):
+            raw = yf.download(
+                symbols,
+                **({"period": "max"} if start is None else {"start": start}),
+                group_by="ticker",
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+            )
+
+        for ticker, bars in members:
+            try:
+                fresh = _to_bars(raw[ticker]["Close"], through)
+            except KeyError:
+                fresh = np.empty(0, dtype=BAR_DTYPE)
+
+            merged = _merge(bars, fresh)
+            if merged is None:
+                # Re-adjusted history: fall back to a full single-ticker download
+                merged = _to_bars(_download(ticker), through)
+            _store(ticker, bars, merged)
+
+
+def _slice(bars, days):
+    """
+    Returns the bars of the last `days` calendar days as a price DataFrame.
+    """
+    if bars is None or len(bars) == 0:
+        index = pd.DatetimeIndex([], tz=MARKET_TZ, name="Date")
+        return pd.DataFrame({"price": pd.Series(dtype="float64", index=index)})
+
+    cutoff = np.datetime64(last_trading_date() - timedelta(days=days), "D")
+    window = bars[np.searchsorted(bars["date"], cutoff, side="right"):]
+
+    index = pd.DatetimeIndex(window["date"].astype("datetime64[ns]"), name="Date").tz_localize(MARKET_TZ)
+    return pd.DataFrame({"price": np.array(window["price"])}, index=index)
+
+
+def get_history(ticker, days=180):
+    """
+    Returns the last `days` calendar days of closing prices for a ticker,
+    syncing the local store first if it is behind.
+
+    Returns:
+        pd.DataFrame: 'price' column indexed by session date.
+    """
+    return _slice(sync(ticker), days)
+
+
+def get_histories(tickers, days=180):
+    """
+    Returns recent closing prices for several tickers, syncing them in bulk.
+
+    Returns:
+        dict: { ticker: pd.DataFrame } for every ticker that has stored data.
+    """
+    sync_many(tickers)
+
+    histories = {}
+    for ticker in tickers:
+        bars = load_bars(ticker)
+        if bars is not None and len(bars):
+            histories[ticker] = _slice(bars, days)
+    return histories
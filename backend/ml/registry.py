@@ -0,0 +1,216 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from app.utils.cache import LRUCache, MISSING
+from app.utils.metrics import register_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: manifest updates are not serialized across processes
+    fcntl = None
+
+# Directory holding one native XGBoost model per ticker plus the manifest
+MODELS_DIR = os.path.join("ml", "models")
+MANIFEST_PATH = os.path.join(MODELS_DIR, "manifest.json")
+
+# How a model forecasts, recorded as its manifest "forecaster": "recursive"
+# (one day per predict, fed back in) or "direct" (every horizon in one predict)
+FORECASTERS = ("recursive", "direct")
+
+# Parsed manifest and the (mtime, size) of the file it was read from
+_manifest = (None, {})
+
+# Loaded boosters kept in memory, bounded by count and by serialized model size
+_boosters = LRUCache(
+    max_entries=int(os.getenv("MODEL_CACHE_SIZE", "256")),
+    max_bytes=int(float(os.getenv("MODEL_CACHE_MAX_MB", "256")) * 1024 * 1024),
+    sizeof=lambda entry: entry[2],
+)
+register_cache("model", _boosters)
+
+
+def model_path(ticker):
+    """
+    Path of a ticker's model in XGBoost's native UBJSON format.
+    """
+    return os.path.join(MODELS_DIR, f"{ticker}.ubj")
+
+
+def _legacy_path(ticker):
+    return os.path.join(MODELS_DIR, f"{ticker}.pkl")
+
+
+def _not_found(ticker):
+    return FileNotFoundError(f"Model not found for ticker: {ticker}. Please train it first.")
+
+
+def _atomic_write(path, write):
+    """
+    Writes a file through a temp file in the same directory and renames it into place.
+
+    Parameters:
+        path (str): Destination path.
+        write (callable): Receives the temp file path and writes the content.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_manifest():
+    """
+    Returns the manifest: { ticker: {trained_at, mae, features, version, ...} }.
+    The file is parsed again only when it has changed since the last read.
+    """
+    global _manifest
+
+    try:
+        stat = os.stat(MANIFEST_PATH)
+    except FileNotFoundError:
+        return {}
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if _manifest[0] != signature:
+        try:
+            with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                _manifest = (signature, json.load(f))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    # Shallow copy: callers may add or replace entries
+    return dict(_manifest[1])
+
+
+def _update_manifest(ticker, entry):
+    """
+    Sets one ticker's manifest entry, serialized across processes with a lock file.
+    """
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    with open(MANIFEST_PATH + ".lock", "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        manifest = read_manifest()
+        manifest[ticker] = entry
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+
+        _atomic_write(MANIFEST_PATH, write)
+
+
+def save_model(ticker, booster, mae=None, features=None, **metadata):
+    """
+    Saves a trained booster in native format and records it in the manifest.
+
+    Parameters:
+        ticker (str): Stock ticker symbol.
+        booster (xgboost.Booster): Trained model.
+        mae (float): Validation MAE.
+        features (list): Ordered feature names the model expects.
+        **metadata: Extra manifest fields (e.g. training mode).
+
+    Returns:
+        int: The new model version.
+    """
+    import xgboost as xgb
+
+    path = model_path(ticker)
+    _atomic_write(path, booster.save_model)
+    version = os.stat(path).st_mtime_ns
+
+    _update_manifest(ticker, {
+        "version": version,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "mae": None if mae is None else float(mae),
+        "features": list(features if features is not None else booster.feature_names or []),
+        "format": "ubj",
+        "xgboost": xgb.__version__,
+        **metadata,
+    })
+
+    # Drop any previously loaded version
+    _boosters.delete_prefix(f"{ticker}\0")
+    return version
+
+
+def _migrate_legacy(ticker):
+    """
+    Converts a pickled XGBRegressor into a native model file, keeping its training date.
+    """
+    # Only needed for models saved before the native format; imported on demand
+    import joblib
+
+    legacy = _legacy_path(ticker)
+    booster = joblib.load(legacy).get_booster()
+    trained_at = datetime.fromtimestamp(os.path.getmtime(legacy), timezone.utc)
+
+    save_model(
+        ticker,
+        booster,
+        trained_at=trained_at.isoformat(timespec="seconds"),
+        migrated_from=os.path.basename(legacy),
+    )
+
+
+def model_version(ticker):
+    """
+    Returns an identifier that changes whenever the ticker's model is rewritten.
+
+    Raises:
+        FileNotFoundError: If no model has been trained for the ticker.
+    """
+    try:
+        return os.stat(model_path(ticker)).st_mtime_ns
+    except FileNotFoundError:
+        if not os.path.exists(_legacy_path(ticker)):
+            raise _not_found(ticker)
+
+    _migrate_legacy(ticker)
+    return os.stat(model_path(ticker)).st_mtime_ns
+
+
+def get_booster(ticker):
+    """
+    Returns the loaded booster for a ticker, reading it from disk only when it
+    is not cached or the file has changed since it was loaded.
+
+    Raises:
+        FileNotFoundError: If no model has been trained for the ticker.
+    """
+    version = model_version(ticker)
+    key = f"{ticker}\0{version}"
+
+    entry = _boosters.get(key)
+    if entry is not MISSING:
+        return entry[0]
+
+    # Remove older versions of this ticker before loading the new one
+    _boosters.delete_prefix(f"{ticker}\0")
+
+    # Imported on first load so processes that only check model versions skip XGBoost
+    import xgboost as xgb
+
+    path = model_path(ticker)
+    booster = xgb.Booster(model_file=path)
+    _boosters.set(key, (booster, version, os.path.getsize(path)))
+    return booster
+
+
+def model_info(ticker):
+    """
+    Returns the manifest entry for a ticker, or None if it has none.
+    """
+    return read_manifest().get(ticker)
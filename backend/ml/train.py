@@ -1,10 +1,38 @@
 import os
-import joblib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import numpy as np
 from xgboost import XGBRegressor
-from ml.utils import fetch_stock_history, build_features
+from ml.utils import fetch_stock_history
+from ml.features import LAGS, training_frame, direct_training_set, feature_schema
+from ml.predict import invalidate_forecasts
+from ml.registry import save_model, get_booster, model_info, FORECASTERS
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error
 
+# Trees and learning rate shared by every training mode
+N_ESTIMATORS = 300
+LEARNING_RATE = 0.05
+
+# Fast mode: stop a fold once its validation MAE has not improved for this many rounds
+EARLY_STOPPING_ROUNDS = int(os.getenv("EARLY_STOPPING_ROUNDS", "30"))
+
+# Total XGBoost threads a training run may use (defaults to every core)
+XGB_THREADS = int(os.getenv("XGB_THREADS", str(os.cpu_count() or 1)))
+
+# Warm start: trees added per newly arrived trading day, and the cap per update
+WARM_START_TREES_PER_DAY = int(os.getenv("WARM_START_TREES_PER_DAY", "5"))
+WARM_START_MAX_TREES = int(os.getenv("WARM_START_MAX_TREES", "50"))
+
+# Forecaster for tickers without a model (see ml.registry.FORECASTERS);
+# retraining keeps a ticker's current forecaster unless another is requested
+DEFAULT_FORECASTER = os.getenv("FORECASTER", "recursive")
+
+# Direct mode: days ahead the model is trained for, and the calendar days of
+# history it learns from (each day contributes one row per horizon)
+DIRECT_HORIZON = int(os.getenv("DIRECT_HORIZON", "30"))
+DIRECT_HISTORY_DAYS = int(os.getenv("DIRECT_HISTORY_DAYS", "730"))
+
 def train_model(X, y):
     """
     Trains an XGBoost regression model on the provided dataset.
@@ -17,8 +45,8 @@ def train_model(X, y):
         XGBRegressor: Trained model instance
     """
     model = XGBRegressor(
-        n_estimators=300,
-        learning_rate=0.05,
+        n_estimators=N_ESTIMATORS,
+        learning_rate=LEARNING_RATE,
         objective="reg:squarederror",
         random_state=42,
         verbosity=0
@@ -26,52 +54,250 @@ def train_model(X, y):
     model.fit(X, y)
     return model
 
-def train_and_save(ticker):
+def _fast_regressor(n_estimators, n_jobs, early_stopping=False):
+    """
+    Builds a histogram-method regressor with explicit threading.
+    """
+    return XGBRegressor(
+        n_estimators=n_estimators,
+        learning_rate=LEARNING_RATE,
+        objective="reg:squarederror",
+        tree_method="hist",
+        n_jobs=n_jobs,
+        random_state=42,
+        verbosity=0,
+        eval_metric="mae",
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS if early_stopping else None,
+    )
+
+def _fit_fold(X_train, y_train, X_val, y_val, n_jobs):
+    """
+    Fits one cross-validation fold with early stopping on its validation split.
+
+    Returns:
+        tuple: (validation MAE, number of trees at the best iteration)
+    """
+    model = _fast_regressor(N_ESTIMATORS, n_jobs, early_stopping=True)
+    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+
+    # predict() uses the best iteration found by early stopping
+    preds = model.predict(X_val)
+    return mean_absolute_error(y_val, preds), model.best_iteration + 1
+
+def _cross_validate(X, y, fast, n_jobs):
+    """
+    Runs 5-fold time series cross-validation.
+
+    In fast mode the folds run concurrently (XGBoost releases the GIL while
+    training) with the thread budget split between them.
+
+    Returns:
+        tuple: (list of fold MAEs, list of best tree counts; empty unless fast)
+    """
+    tscv = TimeSeriesSplit(n_splits=5)
+    folds = [
+        (X.iloc[train_idx], y.iloc[train_idx], X.iloc[val_idx], y.iloc[val_idx])
+        for train_idx, val_idx in tscv.split(X)
+        if len(val_idx) > 0  # Skip iteration if validation set is empty
+    ]
+
+    if not fast:
+        val_scores = []
+        for X_train, y_train, X_val, y_val in folds:
+            model = train_model(X_train, y_train)
+            val_scores.append(mean_absolute_error(y_val, model.predict(X_val)))
+        return val_scores, []
+
+    # Run as many folds at once as the thread budget allows
+    parallel = max(1, min(len(folds), n_jobs))
+    threads_per_fold = max(1, n_jobs // parallel)
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        results = list(executor.map(lambda fold: _fit_fold(*fold, threads_per_fold), folds))
+
+    return [mae for mae, _ in results], [trees for _, trees in results]
+
+def _warm_start(ticker, X, y, n_jobs):
+    """
+    Extends an existing model with extra trees for the days that arrived since
+    it was trained, instead of retraining from scratch.
+
+    Returns:
+        float or None: The model's MAE, or None if a full retrain is required.
+    """
+    info = model_info(ticker) or {}
+    trained_through = info.get("trained_through")
+    if not trained_through or info.get("forecaster", "recursive") != "recursive" \
+            or info.get("feature_schema") != feature_schema("recursive"):
+        return None
+
+    try:
+        booster = get_booster(ticker)
+    except FileNotFoundError:
+        return None
+
+    # Days the current model has not seen yet
+    new_mask = X.index.date > date.fromisoformat(trained_through)
+    new_days = int(new_mask.sum())
+    if new_days == 0:
+        return info.get("mae")
+
+    # Out-of-sample error of the current model on the new days, before updating
+    new_days_mae = mean_absolute_error(
+        y[new_mask], booster.inplace_predict(X[new_mask].to_numpy(), validate_features=False)
+    )
+
+    # Boost on top of the existing trees over the whole recent window
+    extra_trees = min(new_days * WARM_START_TREES_PER_DAY, WARM_START_MAX_TREES)
+    model = _fast_regressor(extra_trees, n_jobs)
+    model.fit(X, y, xgb_model=booster)
+
+    mae = info.get("mae")
+    schema = feature_schema("recursive")
+    save_model(
+        ticker,
+        model.get_booster(),
+        mae=mae,
+        features=schema["features"],
+        feature_schema=schema,
+        mode=info.get("mode", "fast"),
+        forecaster="recursive",
+        trained_through=str(X.index[-1].date()),
+        n_estimators=info.get("n_estimators", 0) + extra_trees,
+        warm_started_days=new_days,
+        new_days_mae=float(new_days_mae),
+    )
+    return mae
+
+def _train_direct(ticker, prices, last_date, horizon, n_jobs):
+    """
+    Trains one model across every horizon with horizon as an input feature.
+
+    Folds split by forecast origin, with a gap of `horizon` days so no training
+    target falls inside the validation period. Each horizon gets its own
+    validation MAE (in price, like the recursive models), averaged over the folds.
+
+    Returns:
+        float: MAE averaged over the horizons.
+    """
+    if len(prices) < LAGS + 3 * horizon:
+        raise ValueError(f"Not enough price history to train a direct model for {ticker}")
+
+    X, y, origin_idx, horizons, origin_close = direct_training_set(prices, horizon)
+    n_origins = origin_idx.max() + 1
+
+    tscv = TimeSeriesSplit(n_splits=5, gap=horizon)
+    fold_errors, best_trees = [], []
+    for train_origins, val_origins in tscv.split(np.arange(n_origins)):
+        train_mask = origin_idx <= train_origins[-1]
+        val_mask = (origin_idx >= val_origins[0]) & (origin_idx <= val_origins[-1])
+
+        model = _fast_regressor(N_ESTIMATORS, n_jobs, early_stopping=True)
+        model.fit(X[train_mask], y[train_mask], eval_set=[(X[val_mask], y[val_mask])], verbose=False)
+        best_trees.append(model.best_iteration + 1)
+
+        # Mean absolute error per horizon (NaN where the fold has no rows for it)
+        errors = np.abs(model.predict(X[val_mask]) - y[val_mask]) * origin_close[val_mask]
+        per_horizon = np.bincount(horizons[val_mask], weights=errors, minlength=horizon + 1)[1:]
+        counts = np.bincount(horizons[val_mask], minlength=horizon + 1)[1:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fold_errors.append(per_horizon / counts)
+
+    horizon_mae = np.nanmean(fold_errors, axis=0)
+    mae = float(np.nanmean(horizon_mae))
+
+    n_estimators = round(sum(best_trees) / len(best_trees))
+    final_model = _fast_regressor(n_estimators, n_jobs)
+    final_model.fit(X, y)
+
+    schema = feature_schema("direct")
+    save_model(
+        ticker,
+        final_model.get_booster(),
+        mae=mae,
+        features=schema["features"],
+        feature_schema=schema,
+        mode="fast",
+        forecaster="direct",
+        horizon=horizon,
+        horizon_mae=[round(float(v), 6) for v in horizon_mae],
+        trained_through=str(last_date.date()),
+        n_estimators=n_estimators,
+    )
+    return mae
+
+def train_and_save(ticker, fast=True, warm_start=False, n_jobs=None, forecaster=None):
     """
     Fetches data for a stock ticker, trains a model using cross-validation,
     saves the final model, and returns the average validation MAE.
 
     Parameters:
         ticker (str): Stock ticker symbol
+        fast (bool): Use histogram trees, parallel early-stopped folds and a
+            final fit sized by the folds' best iteration. False reproduces the
+            original 300-tree serial pipeline.
+        warm_start (bool): If a model already exists, only add trees for the
+            days that arrived since it was trained (falls back to a full train).
+        n_jobs (int): Total XGBoost threads (defaults to XGB_THREADS).
+        forecaster (str): "recursive" or "direct" (see ml.registry.FORECASTERS); defaults to
+            the ticker's current forecaster, or DEFAULT_FORECASTER for a new ticker.
+            Direct models are always trained in fast mode and never warm-started.
 
     Returns:
         float: Average mean absolute error (MAE) across validation folds
     """
-    # Fetch historical price data and generate lag-based features
-    df = fetch_stock_history(ticker)
-    df = build_features(df)
+    n_jobs = n_jobs or XGB_THREADS
 
-    X = df.drop(columns=["price"])
-    y = df["price"]
+    forecaster = forecaster or (model_info(ticker) or {}).get("forecaster") or DEFAULT_FORECASTER
+    if forecaster not in FORECASTERS:
+        raise ValueError(f"Unknown forecaster: {forecaster}")
 
-    # Use time series-aware cross-validation
-    tscv = TimeSeriesSplit(n_splits=5)
-    val_scores = []
+    if forecaster == "direct":
+        history = fetch_stock_history(ticker, days=DIRECT_HISTORY_DAYS)
+        mae = _train_direct(ticker, history["price"].to_numpy(dtype=np.float64), history.index[-1], DIRECT_HORIZON, n_jobs)
+        invalidate_forecasts(ticker)
+        return mae
 
-    for train_idx, val_idx in tscv.split(X):
-        if len(val_idx) == 0:
-            continue  # Skip iteration if validation set is empty
-
-        X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-        y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
+    # Fetch historical price data and generate lag-based features
+    X, y = training_frame(fetch_stock_history(ticker))
 
-        model = train_model(X_train, y_train)
-        preds = model.predict(X_val)
+    if warm_start:
+        mae = _warm_start(ticker, X, y, n_jobs)
+        if mae is not None:
+            invalidate_forecasts(ticker)
+            return mae
 
-        if len(y_val) > 0:
-            mae = mean_absolute_error(y_val, preds)
-            val_scores.append(mae)
+    # Use time series-aware cross-validation
+    val_scores, best_trees = _cross_validate(X, y, fast, n_jobs)
 
     # Calculate average MAE or fallback to 0 if no valid folds
     avg_mae = sum(val_scores) / len(val_scores) if val_scores else 0.0
 
     # Train a final model on all available data
-    final_model = train_model(X, y)
+    if fast:
+        n_estimators = round(sum(best_trees) / len(best_trees)) if best_trees else N_ESTIMATORS
+        final_model = _fast_regressor(n_estimators, n_jobs)
+        final_model.fit(X, y)
+    else:
+        n_estimators = N_ESTIMATORS
+        final_model = train_model(X, y)
+
+    # Save the model to disk in native format and record it in the manifest
+    schema = feature_schema("recursive")
+    save_model(
+        ticker,
+        final_model.get_booster(),
+        mae=avg_mae,
+        features=schema["features"],
+        feature_schema=schema,
+        mode="fast" if fast else "standard",
+        forecaster="recursive",
+        trained_through=str(X.index[-1].date()),
+        n_estimators=n_estimators,
+    )
 
-    # Save the model to disk
-    model_path = os.path.join("ml", "models", f"{ticker}.pkl")
-    os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    joblib.dump(final_model, model_path)
+    # Drop forecasts made with the previous model
+    invalidate_forecasts(ticker)
 
     return avg_mae
 
@@ -0,0 +1,197 @@
+"""
+Bulk model training for a list of tickers or the whole cached symbol universe.
+
+Examples (run from the backend directory):
+
+    python -m ml.train_universe AAPL MSFT NVDA
+    python -m ml.train_universe --file watchlist.txt --workers 4 --threads 2
+    python -m ml.train_universe --universe --max-age-days 1 --resume
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from ml.registry import model_info, FORECASTERS
+from ml.features import check_schema, FeatureSchemaError
+
+# Default locations for the progress journal and the summary table
+DATA_DIR = os.path.join("ml", "data")
+DEFAULT_JOURNAL = os.path.join(DATA_DIR, "train_journal.jsonl")
+DEFAULT_SUMMARY = os.path.join(DATA_DIR, "train_summary.csv")
+
+# Tickers whose history is synced from Yahoo per bulk request
+PREFETCH_CHUNK = 100
+
+
+def _read_tickers(args):
+    """
+    Collects tickers from the command line, a file and/or the symbol snapshot.
+    """
+    tickers = list(args.tickers)
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            tickers += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    if args.universe:
+        from app.routes.search import load_snapshot, SYMBOLS_SNAPSHOT
+
+        stocks = load_snapshot()
+        if stocks is None:
+            sys.exit(f"No symbol snapshot at {SYMBOLS_SNAPSHOT}; start the API once or pass tickers")
+        tickers += [stock["symbol"] for stock in stocks]
+
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    return tickers[:args.limit] if args.limit else tickers
+
+
+def _is_fresh(ticker, max_age_days):
+    """
+    True if the ticker's model was trained less than `max_age_days` ago on
+    the current feature schema.
+    """
+    info = model_info(ticker)
+    if not info or not info.get("trained_at"):
+        return False
+    try:
+        check_schema(ticker, info)
+    except FeatureSchemaError:
+        return False
+    trained_at = datetime.fromisoformat(info["trained_at"])
+    return (datetime.now(timezone.utc) - trained_at).total_seconds() < max_age_days * 86400
+
+
+def _read_journal(path):
+    """
+    Returns { ticker: record } for every ticker already finished in this run.
+    """
+    done = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partially written line from a crash
+                done[record["ticker"]] = record
+    return done
+
+
+def _train_one(ticker, threads, warm_start, forecaster=None):
+    """
+    Runs in a pool process: trains one ticker and times it.
+    """
+    from ml.train import train_and_save
+
+    start = time.perf_counter()
+    try:
+        mae = train_and_save(ticker, warm_start=warm_start, n_jobs=threads, forecaster=forecaster)
+        return {"ticker": ticker, "status": "ok", "mae": mae, "seconds": time.perf_counter() - start}
+    except Exception as e:
+        return {"ticker": ticker, "status": "failed", "error": str(e), "seconds": time.perf_counter() - start}
+
+
+def _prefetch(tickers):
+    """
+    Syncs price history in bulk so pool workers read it from the local store.
+    """
+    from ml.price_store import sync_many
+
+    for i in range(0, len(tickers), PREFETCH_CHUNK):
+        try:
+            sync_many(tickers[i:i + PREFETCH_CHUNK])
+        except Exception as e:
+            print(f"⚠️ Bulk history prefetch failed, workers will fetch individually: {e}")
+
+
+def _write_summary(path, records):
+    """
+    Writes the per-ticker results as CSV and prints a short table.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fields = ["ticker", "status", "mae", "seconds", "error"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+
+    print(f"\n{'Ticker':<10} {'Status':<8} {'MAE':>10} {'Seconds':>9}")
+    for r in records:
+        mae = f"{r['mae']:.4f}" if isinstance(r.get("mae"), (int, float)) else "-"
+        print(f"{r['ticker']:<10} {r['status']:<8} {mae:>10} {r.get('seconds', 0):>9.2f}")
+
+    ok = sum(r["status"] == "ok" for r in records)
+    print(f"\n{ok}/{len(records)} trained — summary written to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train forecasting models for many tickers.")
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols to train")
+    parser.add_argument("--file", help="File with one ticker per line")
+    parser.add_argument("--universe", action="store_true", help="Train every symbol in the cached symbol snapshot")
+    parser.add_argument("--limit", type=int, help="Train at most this many tickers")
+    parser.add_argument("--workers", type=int, help="Training processes (default: cores / threads)")
+    parser.add_argument("--threads", type=int, default=1, help="XGBoost threads per process (default: 1)")
+    parser.add_argument("--max-age-days", type=float, default=1.0, help="Skip models trained more recently than this")
+    parser.add_argument("--warm-start", action="store_true", help="Extend existing models instead of retraining")
+    parser.add_argument("--forecaster", choices=FORECASTERS,
+                        help="Forecaster to train (default: each ticker's current one, else $FORECASTER)")
+    parser.add_argument("--resume", action="store_true", help="Continue a previous run, skipping tickers in its journal")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL, help="Progress journal (JSON lines)")
+    parser.add_argument("--summary", default=DEFAULT_SUMMARY, help="Summary CSV output path")
+    args = parser.parse_args(argv)
+
+    tickers = _read_tickers(args)
+    if not tickers:
+        parser.error("no tickers given (pass symbols, --file or --universe)")
+
+    # Resume from the journal of a previous run, or start a new one
+    os.makedirs(os.path.dirname(args.journal) or ".", exist_ok=True)
+    finished = _read_journal(args.journal) if args.resume else {}
+    if not args.resume:
+        open(args.journal, "w").close()
+
+    records = [finished[t] for t in tickers if t in finished]
+    todo = []
+    for ticker in tickers:
+        if ticker in finished:
+            continue
+        if _is_fresh(ticker, args.max_age_days):
+            records.append({"ticker": ticker, "status": "fresh", "seconds": 0.0})
+        else:
+            todo.append(ticker)
+
+    print(f"{len(tickers)} tickers: {len(todo)} to train, {len(tickers) - len(todo)} skipped")
+
+    if todo:
+        _prefetch(todo)
+
+        workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor, open(args.journal, "a", encoding="utf-8") as journal:
+            futures = [executor.submit(_train_one, t, args.threads, args.warm_start, args.forecaster) for t in todo]
+
+            for i, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                records.append(record)
+
+                # Journal each result immediately so a crash loses at most the in-flight tickers
+                journal.write(json.dumps(record) + "\n")
+                journal.flush()
+
+                status = f"MAE {record['mae']:.4f}" if record["status"] == "ok" else f"failed: {record['error']}"
+                print(f"[{i}/{len(todo)}] {record['ticker']} {status} ({record['seconds']:.1f}s)")
+
+    order = {t: i for i, t in enumerate(tickers)}
+    _write_summary(args.summary, sorted(records, key=lambda r: order[r["ticker"]]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,37 @@
-import yfinance as yf
-import pandas as pd
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+# US equities trade on New York time; daily bars are final after the close
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = time(16, 0)
+
+def last_trading_date(now=None):
+    """
+    Returns the date of the most recent completed US trading session.
+    Weekends are skipped; exchange holidays are not modelled.
+
+    Parameters:
+        now (datetime): Reference time (defaults to the current time).
+
+    Returns:
+        datetime.date: Date of the latest session whose close has passed.
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    day = now.date() if now.time() >= MARKET_CLOSE else now.date() - timedelta(days=1)
+
+    # Step back over Saturday (5) and Sunday (6)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+
+    return day
 
 def fetch_stock_history(ticker, days=180):
     """
     Fetches recent historical closing prices for a given stock ticker.
 
+    Prices are served from the local price store, which downloads only the
+    sessions it is missing from Yahoo Finance.
+
     Parameters:
         ticker (str): Stock ticker symbol (e.g., "AAPL").
         days (int): Number of past days of data to retrieve.
@@ -12,38 +39,24 @@ def fetch_stock_history(ticker, days=180):
     Returns:
         pd.DataFrame: DataFrame containing a 'price' column with datetime index.
     """
-    # Download historical stock data from Yahoo Finance
-    stock = yf.Ticker(ticker)
-    df = stock.history(period=f"{days}d")
-
-    # Extract and rename the closing price
-    df = df[['Close']].rename(columns={"Close": "price"})
+    # Imported here because the price store depends on this module
+    from ml.price_store import get_history
 
-    # Ensure index is datetime for proper time series operations
-    df.index = pd.to_datetime(df.index)
+    return get_history(ticker, days)
 
-    return df
-
-def build_features(df, lags=10):
+def fetch_many_histories(tickers, days=180):
     """
-    Constructs lag features and rolling statistics for time series forecasting.
+    Fetches recent closing prices for several tickers, syncing the local
+    price store with bulk downloads.
 
     Parameters:
-        df (pd.DataFrame): DataFrame containing a 'price' column.
-        lags (int): Number of lag features to generate.
+        tickers (list): Stock ticker symbols.
+        days (int): Number of past days of data to retrieve.
 
     Returns:
-        pd.DataFrame: Feature-enhanced DataFrame with lag and rolling features.
+        dict: { ticker: pd.DataFrame with a 'price' column } for every ticker
+              that returned data. Tickers without data are omitted.
     """
-    # Generate lag features: previous price values up to `lags` days back
-    for i in range(1, lags + 1):
-        df[f"lag_{i}"] = df['price'].shift(i)
-
-    # Add short-term rolling statistics as additional features
-    df['rolling_mean_3'] = df['price'].rolling(3).mean()
-    df['rolling_std_5'] = df['price'].rolling(5).std()
-
-    # Remove rows with NaNs caused by shifting and rolling operations
-    df = df.dropna()
+    from ml.price_store import get_histories
 
-    return df
+    return get_histories(list(tickers), days)
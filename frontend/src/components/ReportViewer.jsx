@@ -110,6 +110,17 @@ const ReportViewer = ({ report }) => {
         </div>
       )}
 
+      {/* Forecast Pending Notice (model still training in the background) */}
+      {!report.priceChart && report.forecastStatus === "pending" && (
+        <div className="bg-white rounded-2xl shadow-md p-6">
+          <h3 className="text-xl font-semibold mb-2 text-blue-800">📊 Price Forecast</h3>
+          <p className="text-sm text-gray-700">
+            ⏳ A forecasting model for {report.ticker ?? "this ticker"} is still being trained.
+            Generate the report again in a minute to see the forecast.
+          </p>
+        </div>
+      )}
+
       {/* News Summary Section */}
       {news.summary && (
         <div className="bg-white rounded-2xl shadow-md p-6">
@@ -3,7 +3,7 @@ import InputForm from "../components/InputForm";
 import ReportViewer from "../components/ReportViewer";
 import DownloadButton from "../components/DownloadButton";
 import Loader from "../components/Loader";
-import { generateReport } from "../utils/api";
+import { streamReport } from "../utils/api";
 
 // Main page component for GenVest
 const Home = () => {
@@ -16,15 +16,36 @@ const Home = () => {
   // Message to display during loading (e.g. training status)
   const [loadingMessage, setLoadingMessage] = useState("");
 
+  // Apply one streamed event to the report being built
+  const applyEvent = (event) => {
+    if (event.type === "section") {
+      // Section data is a set of report fields to merge in
+      setReport((current) => ({ ...current, ...event.data }));
+    } else if (event.type === "token") {
+      // Append generated text to the section it belongs to
+      setReport((current) => {
+        if (event.section === "news") {
+          const news = current.news || {};
+          return { ...current, news: { ...news, summary: (news.summary || "") + event.text } };
+        }
+        return { ...current, [event.section]: (current[event.section] || "") + event.text };
+      });
+    } else if (event.type === "done") {
+      setReport((current) => ({ ...current, reportId: event.reportId }));
+    } else if (event.type === "error") {
+      throw new Error(event.error);
+    }
+  };
+
   // Function to handle the form submission and trigger report generation
   const handleGenerate = async (ticker, openaiKey, serperKey) => {
     setLoadingMessage(`⏳ Generating Investment Report for ${ticker.toUpperCase()}...`);
     setLoading(true);
+    setReport({ ticker: ticker.toUpperCase() });
 
     try {
-      // Call API to generate the report
-      const result = await generateReport(ticker, openaiKey, serperKey);
-      setReport(result);
+      // Stream the report; sections render as soon as they arrive
+      await streamReport(ticker, openaiKey, serperKey, applyEvent);
     } catch (error) {
       console.error("Error generating report:", error);
     } finally {
@@ -43,16 +64,14 @@ const Home = () => {
         {/* Input Form for ticker and API keys */}
         <InputForm onSubmit={handleGenerate} />
 
-        {/* Show loader while report is being generated */}
+        {/* Show the report as its sections arrive */}
+        {report && report.marketData && <ReportViewer report={report} />}
+
+        {/* Show loader while the rest of the report is being generated */}
         {loading && <Loader message={loadingMessage} />}
 
-        {/* Once loading is done and report exists, show report and download button */}
-        {!loading && report && (
-          <>
-            <ReportViewer report={report} />
-            <DownloadButton report={report} />
-          </>
-        )}
+        {/* Once loading is done and report exists, show the download button */}
+        {!loading && report && report.marketData && <DownloadButton report={report} />}
       </div>
     </div>
   );
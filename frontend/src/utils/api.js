@@ -26,17 +26,71 @@ export async function generateReport(ticker, openaiKey, serperKey) {
   return await res.json();
 }
 
+/**
+ * Generates a report through the streaming endpoint, calling `onEvent` with
+ * each NDJSON event (section, token, done or error) as it arrives
+ */
+export async function streamReport(ticker, openaiKey, serperKey, onEvent) {
+  const res = await fetch(`${BASE_URL}/report/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    // Send ticker and API keys to the backend
+    body: JSON.stringify({
+      ticker,
+      openai_key: openaiKey,
+      serper_key: serperKey,
+    }),
+  });
+
+  // Throw an error if the backend response is not successful
+  if (!res.ok) {
+    throw new Error("Failed to generate report");
+  }
+
+  // Read the body incrementally and hand over each complete line
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split("\n");
+    buffered = lines.pop();
+
+    for (const line of lines) {
+      if (line.trim()) onEvent(JSON.parse(line));
+    }
+  }
+
+  if (buffered.trim()) onEvent(JSON.parse(buffered));
+}
+
 /**
  * Downloads a generated investment report as a PDF file
  */
 export const downloadPDF = async (report) => {
   try {
-    // Send the report object to the backend for PDF generation
-    const response = await fetch(`${BASE_URL}/download`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ report }),
-    });
+    const requestPDF = (payload) =>
+      fetch(`${BASE_URL}/download`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(payload),
+      });
+
+    // Reports stored by the backend only need their ID; otherwise send the whole report
+    let response = report.reportId
+      ? await requestPDF({ report_id: report.reportId })
+      : await requestPDF({ report });
+
+    // Stored report expired: fall back to sending the report content
+    if (response.status === 404 && report.reportId) {
+      response = await requestPDF({ report });
+    }
 
     // Handle failed download attempt
     if (!response.ok) {